@@ -1,6 +1,16 @@
+from functools import partial
+
+import pandas as pd
 import streamlit as st
 
+from module.agent_cache import get_agent_cache
+from module.audit import report_path, run_audit
+from module.database import get_client, pool_stats
+from module.jobs import jobs_for, session_owner, submit
+from module.offline import offline_enabled
+from module.page_cache import page_cache
 from module.password import check_password
+from module.timing import timing_stats
 
 st.set_page_config(
     page_title="TianGong Knowledge Base Admin",
@@ -11,3 +21,48 @@ st.set_page_config(
 
 if check_password():
     st.success('Password correct!', icon="✅")
+    if offline_enabled():
+        st.info("Offline mode: Supabase, the ESG agent and the NAS are simulated.")
+
+    with st.expander("Database connection pool"):
+        st.json(pool_stats())
+
+    with st.expander("Page cache"):
+        st.json(page_cache.stats())
+
+    with st.expander("Page render time"):
+        st.json(timing_stats())
+
+    with st.expander("ESG agent result cache"):
+        st.json(get_agent_cache().stats())
+
+    with st.expander("NAS integrity audit"):
+        st.caption(
+            "Checks that uploaded records have a file on the NAS, that NAS files "
+            "belong to records, and that stored file sizes match."
+        )
+        if st.button("Run audit"):
+            directory = st.secrets.get("audit", {}).get("path", ".audit")
+            path = report_path(directory)
+            job = submit(
+                session_owner(),
+                f"NAS audit {path}",
+                partial(run_audit, get_client(), path),
+            )
+            st.session_state.setdefault("audit_reports", {})[job.id] = path
+
+        reports = st.session_state.get("audit_reports", {})
+        for job in jobs_for(session_owner()):
+            if job.id not in reports:
+                continue
+            st.write(f"**{job.label}**: {job.status} {job.message}")
+            if job.status == "done":
+                st.dataframe(pd.DataFrame(job.result).T, use_container_width=True)
+                with open(reports[job.id], "rb") as report:
+                    st.download_button(
+                        "Download report",
+                        report,
+                        file_name=reports[job.id].rsplit("/", 1)[-1],
+                        mime="text/csv",
+                        key=f"audit-{job.id}",
+                    )
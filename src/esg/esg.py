@@ -1,21 +1,149 @@
-import os
-import streamlit as st
-from langgraph.pregel.remote import RemoteGraph
+"""Batch harvester for the esg_search_agent graph.
 
-url = st.secrets["langgraph"]["url"]
-api_key = st.secrets["langgraph"]["api_key"]
-graph_name = "esg_search_agent"
+Run from ``src``::
 
-remote_graph = RemoteGraph(graph_name, url=url, api_key=api_key)
+    python -m esg.esg --missing-reports --out results.jsonl
+    python -m esg.esg --input companies.csv --concurrency 4 --rate 30
+    python -m esg.esg --checkpoint harvest.sqlite3 --missing-reports
+    python -m esg.esg --checkpoint harvest.sqlite3  # resume
 
+With ``--checkpoint`` the queries and their results are kept in a local
+SQLite file and report URLs are written to esg_meta in batches as they
+arrive; running the same command again resumes where it stopped. Only
+queries with a record id are written; the others are counted as unmatched.
+
+The CSV needs a ``company`` column and may have ``year`` and ``id`` columns.
+"""
+
+import argparse
 import asyncio
+import csv
+import itertools
+import json
+import sys
+
+from module.agent_cache import get_agent_cache
+from module.database import get_client
+from module.esg_agent import Query, agent_settings, missing_report_queries, run_batch
+from module.harvest import HarvestCheckpoint, run_harvest
+
 
+def read_queries(path: str):
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            if row.get("company"):
+                year = row.get("year")
+                yield Query(row["company"], int(year) if year else None, row.get("id"))
 
-async def main():
-    result = await remote_graph.ainvoke(
-        {"messages": [{"role": "user", "content": "3M India Ltd. 2023"}]}
+
+def main():
+    settings = agent_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="CSV file with company,year[,id] rows")
+    source.add_argument(
+        "--missing-reports",
+        action="store_true",
+        help="query every esg_meta row without a report_url",
+    )
+    parser.add_argument("--limit", type=int, help="stop after this many queries")
+    parser.add_argument("--concurrency", type=int, default=settings["concurrency"])
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=settings["rate_per_minute"],
+        help="maximum queries started per minute",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always call the agent"
     )
-    print(result)
+    parser.add_argument("--checkpoint", help="resumable harvest checkpoint file")
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="with --checkpoint, run failed queries again",
+    )
+    parser.add_argument(
+        "--no-write",
+        action="store_true",
+        help="with --checkpoint, do not write report URLs to esg_meta",
+    )
+    parser.add_argument("--out", help="JSON lines output file (default: stdout)")
+    args = parser.parse_args()
+    if not (args.input or args.missing_reports or args.checkpoint):
+        parser.error("one of --input, --missing-reports or --checkpoint is required")
+
+    queries = ()
+    if args.input:
+        queries = read_queries(args.input)
+    elif args.missing_reports:
+        queries = missing_report_queries(get_client(), limit=args.limit)
+    if args.input and args.limit:
+        queries = itertools.islice(queries, args.limit)
+
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = HarvestCheckpoint(args.checkpoint)
+        added = checkpoint.add(queries)
+        if args.retry_failed:
+            checkpoint.retry_failed()
+        print(f"{added} new queries, {checkpoint.counts()}", file=sys.stderr)
+
+    out = sys.stdout
+    if args.out:
+        # 续跑时追加到已有的输出文件
+        out = open(args.out, "a" if checkpoint else "w", encoding="utf-8")
+    done = {"ok": 0, "failed": 0}
+
+    def on_result(result):
+        # 每个结果完成后立即写出，中断时已完成的结果不会丢失
+        done["ok" if result.error is None else "failed"] += 1
+        record = {
+            **result.query._asdict(),
+            "query": result.query.text,
+            "answer": result.answer if result.error is None else None,
+            "output": result.output,
+            "error": result.error,
+            "elapsed": round(result.elapsed, 2),
+            "attempts": result.attempts,
+            "cached": result.cached,
+        }
+        out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+        print(
+            f"{done['ok']} ok, {done['failed']} failed: {result.query.text}",
+            file=sys.stderr,
+        )
+
+    cache = None if args.no_cache else get_agent_cache()
+    try:
+        if checkpoint is not None:
+            counts = asyncio.run(
+                run_harvest(
+                    get_client(),
+                    checkpoint,
+                    concurrency=args.concurrency,
+                    rate_per_minute=args.rate,
+                    cache=cache,
+                    on_result=on_result,
+                    write=not args.no_write,
+                )
+            )
+            print(f"Finished: {counts}", file=sys.stderr)
+        else:
+            asyncio.run(
+                run_batch(
+                    queries,
+                    concurrency=args.concurrency,
+                    rate_per_minute=args.rate,
+                    on_result=on_result,
+                    cache=cache,
+                )
+            )
+    finally:
+        if out is not sys.stdout:
+            out.close()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,15 @@ from datetime import datetime
 import pandas as pd
 import pytz
 import streamlit as st
-from supabase import Client, create_client
+from supabase import Client
+
+from module.bulk_write import commit_changes
+from module.database import get_client
+from module.frame_diff import diff_editor_state, editor_ids
+from module.mirror import apply_to_mirror
+from module.pagination import fetch_page
+from module.row_count import get_row_count
+from module.versions import bump_table_version, table_version
 
 # from module.file_local import upload_file
 
@@ -24,18 +32,14 @@ if "password_correct" not in st.session_state:
 
     timezone = pytz.timezone("Asia/Shanghai")
     # 初始化 Supabase 客户端
-    supabase: Client = create_client(st.secrets.supabase.url, st.secrets.supabase.key)
+    supabase: Client = get_client()
 
-    @st.cache_data(show_spinner=False, ttl=600)
-    def get_total_count(data_version: int):
+    def get_total_count():
         try:
-            count_response = (
-                supabase.table("standards").select("id", count="exact").execute()
-            )
-            return count_response.count
+            return get_row_count(supabase, "standards")
         except Exception as e:
             st.error(f"Error fetching total count: {e}")
-            return 0
+            return 0, True
 
     @st.cache_data(show_spinner=False)
     def fetch_data(
@@ -46,19 +50,20 @@ if "password_correct" not in st.session_state:
         data_version: int = 0,
     ):
         try:
-            query = supabase.table("standards").select(
+            if not sort_field:
+                sort_field, sort_order = "last_updated_time", "desc"
+            rows = fetch_page(
+                supabase,
+                "standards",
                 "id, title, issuing_organization, effective_date, expiration_date, "
-                "standard_number, url, uploaded_time, last_updated_time"
+                "standard_number, url, uploaded_time, last_updated_time",
+                page_number=page_number,
+                page_size=page_size,
+                sort_field=sort_field,
+                descending=(sort_order == "desc"),
+                version=data_version,
             )
-
-            if sort_field:
-                query = query.order(sort_field, desc=(sort_order == "desc"))
-            else:
-                query = query.order("last_updated_time", desc=True)
-
-            start = (page_number - 1) * page_size
-            response = query.limit(page_size).offset(start).execute()
-            dataset = pd.DataFrame(response.data)
+            dataset = pd.DataFrame(rows)
             dataset["issuing_organization"] = dataset["issuing_organization"].astype(str)
             dataset["effective_date"] = pd.to_datetime(
                 dataset["effective_date"], utc=True
@@ -77,38 +82,22 @@ if "password_correct" not in st.session_state:
             st.error(f"Error fetching data: {e}")
             return pd.DataFrame()
 
-    def create_record(data):
-        try:
-            response = supabase.table("standards").insert(data).execute()
-            st.success("Record created successfully")
-            st.session_state.data_version += 1
-        except Exception as e:
-            st.error(f"Error creating record: {e}")
-
     def update_record(id, data):
         try:
             response = (
                 supabase.table("standards").update(data).eq("id", id).execute()
             )
             st.success(f"Record with ID {id} updated successfully")
-            st.session_state.data_version += 1
+            apply_to_mirror("standards", response.data)
+            bump_table_version("standards")
         except Exception as e:
             st.error(f"Error updating record: {e}")
 
-    def delete_record(id):
-        try:
-            response = supabase.table("standards").delete().eq("id", id).execute()
-            st.session_state.data_version += 1
-            st.success(f"Record with ID {id} deleted successfully")
-        except Exception as e:
-            st.error(f"Error deleting record: {e}")
-
-    # 初始化 data_version
-    if "data_version" not in st.session_state:
-        st.session_state.data_version = 0
+    # 数据版本在所有会话间共享，任何写入都会使缓存的页面失效
+    data_version = table_version("standards")
 
     # 获取总记录数
-    total_count = get_total_count(st.session_state.data_version)
+    total_count, count_exact = get_total_count()
 
     # 定义列
     columns = [
@@ -151,6 +140,8 @@ if "password_correct" not in st.session_state:
             )
     with bottom_menu[1]:
         total_pages = max(1, (total_count + batch_size - 1) // batch_size)
+        # 估计值可能偏小，预留少量页数
+        max_page = total_pages if count_exact else total_pages + total_pages // 20 + 1
         col1, col2 = st.columns([1, 2])
         with col1:
             st.write("Page")
@@ -159,12 +150,18 @@ if "password_correct" not in st.session_state:
                 "Page",
                 label_visibility="collapsed",
                 min_value=1,
-                max_value=total_pages,
+                max_value=max_page,
                 step=1,
                 value=1,
             )
     with bottom_menu[0]:
-        st.markdown(f"Page **{current_page}** of **{total_pages}**")
+        if count_exact:
+            st.markdown(f"Page **{current_page}** of **{total_pages}**")
+        else:
+            st.markdown(
+                f"Page **{current_page}** of **~{total_pages}** "
+                f"(about {total_count:,} rows, estimated)"
+            )
 
     # 获取当前页面的数据
     dataset = fetch_data(
@@ -172,25 +169,28 @@ if "password_correct" not in st.session_state:
         page_size=batch_size,
         sort_field=sort_field,
         sort_order=sort_order,
-        data_version=st.session_state.data_version,
+        data_version=data_version,
     )
 
-    # 使用 Session State 保存原始数据
-    if "original_data" not in st.session_state:
-        st.session_state.original_data = dataset.copy()
-    else:
-        # 更新 session state 如果页面或数据发生变化
-        if (
-            st.session_state.original_data.empty
-            or st.session_state.original_data.shape != dataset.shape
-            or not st.session_state.original_data.equals(dataset)
-        ):
-            st.session_state.original_data = dataset.copy()
+    # 显示上一次保存的结果
+    if "save_result" in st.session_state:
+        result = st.session_state.pop("save_result")
+        if result.ok:
+            st.success(f"All changes have been saved: {result.summary()}.")
+        else:
+            st.warning(f"Some changes were not saved: {result.summary()}.")
+            for operation, ids, error in result.failed:
+                st.error(f"{operation} {ids or 'new records'}: {error}")
+
+    # 编辑器中的行位置对应上一次绘制时的记录；其他会话的写入可能已改变当前页，
+    # 保存时按当时的 id 列表解析位置
+    rendered_ids = st.session_state.get("editor_ids", [])
+    st.session_state.editor_ids = editor_ids(dataset)
 
     # 使用表单封装数据编辑器和保存按钮，防止重复执行
     with st.form("data_form", clear_on_submit=False):
         # 显示数据编辑器
-        edited_data = st.data_editor(
+        st.data_editor(
             data=dataset,
             disabled=["id"],  # 使 'id' 列只读
             use_container_width=True,
@@ -230,101 +230,28 @@ if "password_correct" not in st.session_state:
         submitted = st.form_submit_button("Save Changes")
 
         if submitted:
-            original_df = st.session_state.original_data
-            edited_df = edited_data
-
             # 确保 'id' 列存在
-            if "id" not in edited_df.columns:
+            if "id" not in dataset.columns:
                 st.error("'id' column is missing. Unable to perform CRUD operations.")
             else:
-                # 将 'id' 转换为字符串以避免类型不匹配
-                original_ids = set(original_df["id"].astype(str))
-                edited_ids = set(edited_df["id"].astype(str).dropna())
-
-                # 标识删除的记录：在原始中存在但在编辑后不存在
-                deleted_ids = original_ids - edited_ids
-                if deleted_ids:
-                    st.warning(
-                        f"Detected {len(deleted_ids)} deletions. Proceeding to delete them."
-                    )
-                    for del_id in deleted_ids:
-                        delete_record(del_id)
-                    st.rerun()
-
-                # 标识新增的记录：'id' 为 NaN
-                new_records = edited_df[edited_df["id"].isna()]
-                if not new_records.empty:
-                    st.info(
-                        f"Detected {len(new_records)} new records. Proceeding to create them."
-                    )
-                    for _, row in new_records.iterrows():
-                        new_data = row.drop(
-                            ["id", "last_updated_time", "uploaded_time"]
-                        ).to_dict()  # 排除 'id' 以实现自增
-
-                        if "effective_date" in new_data and isinstance(
-                            new_data["effective_date"], pd.Timestamp
-                        ):
-                            new_data["effective_date"] = new_data[
-                                "effective_date"
-                            ].strftime("%Y-%m-%d %H:%M:%S%z")
-                        
-                        if "expiration_date" in new_data and isinstance(
-                            new_data["expiration_date"], pd.Timestamp
-                        ):
-                            new_data["expiration_date"] = new_data[
-                                "expiration_date"
-                            ].strftime("%Y-%m-%d %H:%M:%S%z")
-                        
-                        create_record(new_data)
-                        st.rerun()
-
-                # 标识更新的记录：在原始和编辑后都存在，但内容不同
-                common_ids = original_ids & edited_ids
-                for cid in common_ids:
-                    original_row = original_df[
-                        original_df["id"].astype(str) == cid
-                    ].iloc[0]
-                    edited_row = edited_df[edited_df["id"].astype(str) == cid].iloc[0]
-                    # 比较除 'id' 外的内容是否有变化
-                    if not original_row.drop(
-                        ["id", "last_updated_time", "uploaded_time"]
-                    ).equals(
-                        edited_row.drop(
-                            ["id", "last_updated_time", "uploaded_time"]
-                        )
-                    ):
-                        update_data = edited_row.drop(
-                            ["id", "last_updated_time", "uploaded_time"]
-                        ).to_dict()
-                        if "effective_date" in new_data and isinstance(
-                            new_data["effective_date"], pd.Timestamp
-                        ):
-                            new_data["effective_date"] = new_data[
-                                "effective_date"
-                            ].strftime("%Y-%m-%d %H:%M:%S%z")
-                        
-                        if "expiration_date" in new_data and isinstance(
-                            new_data["expiration_date"], pd.Timestamp
-                        ):
-                            new_data["expiration_date"] = new_data[
-                                "expiration_date"
-                            ].strftime("%Y-%m-%d %H:%M:%S%z")
-                        update_record(cid, update_data)
-                        st.rerun()
-
-                # 增加 data_version 以刷新缓存
-                st.session_state.data_version += 1
-
-                # 刷新原始数据以反映更改
-                st.session_state.original_data = fetch_data(
-                    page_number=current_page,
-                    page_size=batch_size,
-                    sort_field=sort_field,
-                    sort_order=sort_order,
-                    data_version=st.session_state.data_version,
+                # 直接使用数据编辑器记录的增删改，无需在 session 中保留整页副本
+                changes = diff_editor_state(
+                    st.session_state["data_editor"],
+                    rendered_ids,
+                    dataset.columns,
+                    key="id",
+                    ignore=("last_updated_time", "uploaded_time"),
                 )
-                st.success("All changes have been saved successfully.")
+
+                if changes.is_empty():
+                    st.info("No changes to save.")
+                else:
+                    # 批量提交：相同修改的行共用一个 update，一次 delete、一次 insert
+                    result = commit_changes(supabase, "standards", changes)
+                    st.session_state.save_result = result
+
+                    # commit_changes 已更新数据版本，只重新运行一次
+                    st.rerun()
 
     with st.expander("Upload File for Selected Record"):
         # 构建选项列表
@@ -361,8 +288,8 @@ if "password_correct" not in st.session_state:
                     except Exception as e:
                         st.error(f"An error occurred during file upload: {e}")
 
-                    # 增加 data_version 以刷新缓存
-                    st.session_state.data_version += 1
+                    # 更新数据版本以刷新所有会话的缓存
+                    bump_table_version("standards")
 
                     # Rerun to refresh data_editor
                     st.rerun()
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import streamlit as st
+
+TTL = 30 * 24 * 3600
+MAX_BYTES = 200 * 1024 * 1024
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(text.casefold().split())
+
+
+def cache_key(graph_name: str, text: str) -> str:
+    return hashlib.sha256(
+        f"{graph_name}\0{normalize_query(text)}".encode("utf-8")
+    ).hexdigest()
+
+
+class AgentCache:
+    """SQLite cache of agent results keyed by graph name and normalized query.
+
+    Entries expire after ``ttl`` seconds; when the stored results exceed
+    ``max_bytes`` the least recently used ones are removed. Identical
+    queries running at the same time share one call through
+    :meth:`single_flight`, also across threads and event loops.
+    """
+
+    def __init__(self, path: str, ttl: float = TTL, max_bytes: int = MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                "graph TEXT, query TEXT, output TEXT, size INTEGER, "
+                "created REAL, accessed REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+        # key -> Future of the call in flight
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, graph_name: str, text: str):
+        """Returns the cached output, or None if missing or expired."""
+        key = cache_key(graph_name, text)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT output, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, graph_name: str, text: str, output):
+        data = json.dumps(output, ensure_ascii=False, default=str)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(graph_name, text), graph_name, text, data, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed"
+        ):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    async def single_flight(self, graph_name: str, text: str, call):
+        """Awaits ``call()`` once for all concurrent identical queries."""
+        key = cache_key(graph_name, text)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await call()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_agent_cache() -> AgentCache:
+    """Returns the process-wide agent result cache."""
+    settings = st.secrets.get("agent_cache", {})
+    directory = settings.get("path", ".agent_cache")
+    os.makedirs(directory, exist_ok=True)
+    return AgentCache(
+        os.path.join(directory, "results.sqlite3"),
+        ttl=float(settings.get("ttl_days", TTL / 86400)) * 86400,
+        max_bytes=int(settings.get("max_mb", MAX_BYTES / 2**20) * 2**20),
+    )
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from module.agent_cache import AgentCache
+from module.esg_agent import GRAPH_NAME, TIMEOUT, find_urls, new_remote_graph
+
+# 流式输出中保留的消息数
+MAX_EVENTS = 200
+
+
+def _message_text(message) -> str:
+    content = message.get("content") if isinstance(message, dict) else message
+    if isinstance(content, list):
+        # 多段内容只取文本部分
+        content = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content or "").strip()
+
+
+class AgentRun:
+    """One streaming run of the agent graph on a background thread.
+
+    The page polls :meth:`snapshot` while the run is active; messages and
+    candidate URLs appear as the graph's nodes report them, before the run
+    has finished. A finished run's final state is stored in ``cache``.
+    """
+
+    def __init__(self, query: str, graph_name: str = GRAPH_NAME, cache=None):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.graph_name = graph_name
+        self.cache: AgentCache = cache
+        self.status = "running"
+        self.error = None
+        self.started = time.monotonic()
+        self.first_candidate = None
+        self.finished = None
+        self._events = []
+        # url -> {"url", "node", "context"}，按出现顺序
+        self._candidates = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, query: str, graph_name: str = GRAPH_NAME, cache=None):
+        run = cls(query, graph_name, cache)
+        cached = cache.get(graph_name, query) if cache is not None else None
+        if cached is not None:
+            # 缓存命中时直接显示最终结果
+            run._update("cache", cached)
+            run._finish("done")
+            return run
+        threading.Thread(target=run._run, name=f"agent-{run.id}", daemon=True).start()
+        return run
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def active(self) -> bool:
+        return self.status == "running"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "events": list(self._events),
+                "candidates": list(self._candidates.values()),
+                "elapsed": (self.finished or time.monotonic()) - self.started,
+                "first_candidate": self.first_candidate,
+            }
+
+    def _finish(self, status: str, error: str = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished = time.monotonic()
+
+    def _update(self, node: str, update):
+        messages = update.get("messages", []) if isinstance(update, dict) else []
+        with self._lock:
+            for message in messages if isinstance(messages, list) else [messages]:
+                text = _message_text(message)
+                if text:
+                    self._events.append((node, text))
+            del self._events[:-MAX_EVENTS]
+            for url, text, match in find_urls(update):
+                if url not in self._candidates:
+                    start = max(0, match.start() - 80)
+                    self._candidates[url] = {
+                        "url": url,
+                        "node": node,
+                        "context": text[start : match.end() + 80],
+                    }
+                    if self.first_candidate is None:
+                        self.first_candidate = time.monotonic() - self.started
+
+    def _run(self):
+        try:
+            asyncio.run(asyncio.wait_for(self._consume(), TIMEOUT))
+        except Exception as e:
+            self._finish("failed", f"{type(e).__name__}: {e}")
+
+    async def _consume(self):
+        # 每次运行使用独立的客户端，httpx 的异步连接不能跨事件循环复用
+        graph = new_remote_graph(self.graph_name)
+        final = None
+        async for mode, chunk in graph.astream(
+            {"messages": [{"role": "user", "content": self.query}]},
+            stream_mode=["updates", "values"],
+        ):
+            if self._stop.is_set():
+                self._finish("stopped")
+                return
+            if mode == "values":
+                final = chunk
+            elif isinstance(chunk, dict):
+                for node, update in chunk.items():
+                    self._update(node, update)
+        if self.cache is not None and final is not None:
+            self.cache.put(self.graph_name, self.query, final)
+        self._finish("done")
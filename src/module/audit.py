@@ -0,0 +1,139 @@
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from supabase import Client
+
+from module.file_nas import list_files, nas_folder
+
+# 每次从数据库读取的记录数
+BATCH_SIZE = 1000
+# 按 ID 查询时每个请求的 ID 数，避免 URL 过长
+ID_BATCH = 200
+MAX_WORKERS = 4
+# 存放上传文件的表，与上传页面一致
+TABLES = ("esg_meta", "reports", "standards", "internal_use")
+
+REPORT_COLUMNS = ("table", "problem", "record_id", "file", "db_size", "nas_size")
+
+
+def _stream_uploaded(client: Client, table: str):
+    """Yields batches of rows with a non-null ``uploaded_time``, keyset by id."""
+    last_id = None
+    while True:
+        query = (
+            client.table(table)
+            .select("id, file_size")
+            .not_.is_("uploaded_time", "null")
+            .order("id")
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+        if len(rows) < BATCH_SIZE:
+            return
+
+
+def _record_ids(client: Client, table: str, ids: list) -> set:
+    """Returns which of ``ids`` exist in ``table``."""
+    found = set()
+    for i in range(0, len(ids), ID_BATCH):
+        rows = (
+            client.table(table)
+            .select("id")
+            .in_("id", ids[i : i + ID_BATCH])
+            .execute()
+            .data
+        )
+        found.update(str(row["id"]) for row in rows)
+    return found
+
+
+def audit_table(client: Client, table: str, write) -> dict:
+    """Compares one table with its NAS folder and writes problems via ``write``.
+
+    Only the NAS listing (file name and size per record id) is held in
+    memory; database rows are streamed in batches of ``BATCH_SIZE`` and
+    checked against it with set operations.
+    """
+    # 记录 ID -> [(文件名, 大小)]；同一记录可能有不同扩展名的文件
+    nas = {}
+    for name, size in list_files(nas_folder(table)):
+        nas.setdefault(os.path.splitext(name)[0], []).append((name, size))
+
+    counts = {"records": 0, "files": sum(len(f) for f in nas.values())}
+    problems = dict.fromkeys(
+        ("missing", "size_mismatch", "duplicate", "orphaned", "not_marked_uploaded"), 0
+    )
+    unmatched = set(nas)
+    for rows in _stream_uploaded(client, table):
+        counts["records"] += len(rows)
+        sizes = {str(row["id"]): row.get("file_size") for row in rows}
+        ids = set(sizes)
+        for record_id in ids - nas.keys():
+            write((table, "missing", record_id, "", sizes[record_id], ""))
+            problems["missing"] += 1
+        for record_id in ids & nas.keys():
+            files, db_size = nas[record_id], sizes[record_id]
+            if len(files) > 1:
+                for name, size in files:
+                    write((table, "duplicate", record_id, name, db_size, size))
+                problems["duplicate"] += 1
+            name, size = files[0]
+            if db_size is not None and size != db_size:
+                write((table, "size_mismatch", record_id, name, db_size, size))
+                problems["size_mismatch"] += 1
+        unmatched -= ids
+
+    # NAS 上剩余的文件：记录不存在，或记录存在但没有 uploaded_time
+    existing = _record_ids(client, table, sorted(unmatched))
+    for record_id in sorted(unmatched):
+        for name, size in nas[record_id]:
+            problem = "not_marked_uploaded" if record_id in existing else "orphaned"
+            write((table, problem, record_id, name, "", size))
+            problems[problem] += 1
+    return {**counts, **problems}
+
+
+def run_audit(client: Client, path: str, report=None, tables=TABLES) -> dict:
+    """Audits ``tables`` concurrently and writes a CSV report to ``path``.
+
+    Returns ``{table: counts}`` with the number of records, files and of each
+    problem kind. ``report(fraction, message)`` is called as tables finish.
+    """
+    report = report or (lambda fraction, message=None: None)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock = threading.Lock()
+    summary = {}
+    with open(path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        writer.writerow(REPORT_COLUMNS)
+
+        def write(row):
+            with lock:
+                writer.writerow(row)
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(tables)), thread_name_prefix="audit"
+        ) as executor:
+            futures = {
+                executor.submit(audit_table, client, table, write): table
+                for table in tables
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                summary[table] = future.result()
+                report(len(summary) / len(tables), f"Audited {table}")
+    return summary
+
+
+def report_path(directory: str) -> str:
+    """Returns a new timestamped report file name in ``directory``."""
+    return os.path.join(directory, time.strftime("audit-%Y%m%d-%H%M%S.csv"))
@@ -0,0 +1,254 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+import pandas as pd
+from postgrest.exceptions import APIError
+from supabase import Client
+
+from module.file_nas import MAX_SPOOLS, upload_stream
+from module.pagination import quote_value
+
+# 每个请求匹配的标题数，避免 URL 过长
+TITLE_BATCH = 50
+
+# 文件名开头的记录 ID：UUID 或整数，后面可跟分隔符和任意文字
+_ID_PREFIX = re.compile(
+    r"^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)"
+    r"(?:$|[\s_.-])"
+)
+
+
+class Match(NamedTuple):
+    """Record chosen for one uploaded file; ``record_id`` is None if unmatched."""
+
+    file_name: str
+    record_id: str
+    reason: str
+
+
+def _stem(file_name: str) -> str:
+    return os.path.splitext(os.path.basename(file_name))[0].strip()
+
+
+def _like_exact(text: str) -> str:
+    # 不带通配符的 ilike 即忽略大小写的相等比较；文件名中的 _ 正好匹配标题中的空格
+    return quote_value(text.replace("%", "\\%"))
+
+
+def match_files(client: Client, table: str, title_column: str, names: list) -> list:
+    """Matches file names to records of ``table``.
+
+    A name that is a record id (``<id>.pdf``) or starts with a UUID id is
+    matched by id. Other names are compared case-insensitively with
+    ``title_column`` first, so "2023 Annual Report.pdf" is not taken for
+    record 2023; a leading numeric id (``<id>_annual.pdf``) is the fallback.
+    Ids are looked up in one request and titles in batches of
+    ``TITLE_BATCH``. A title shared by several records is not matched.
+    """
+    prefixes, exact = {}, set()
+    for name in names:
+        stem = _stem(name)
+        found = _ID_PREFIX.match(stem)
+        if found:
+            prefixes[name] = found.group(1)
+            if found.group(1) == stem or not found.group(1).isdigit():
+                exact.add(name)
+
+    known = set()
+    for numeric in (True, False):
+        ids = sorted({i for i in prefixes.values() if i.isdigit() == numeric})
+        if not ids:
+            continue
+        try:
+            rows = client.table(table).select("id").in_("id", ids).execute().data
+        except APIError:
+            # 整数形式的候选 ID 与 uuid 列（或反之）类型不符，视为不存在
+            continue
+        known.update(str(row["id"]) for row in rows)
+
+    by_title = {}
+    stems = sorted(
+        {_stem(n) for n in names if not (n in exact and prefixes[n] in known)}
+    )
+    for i in range(0, len(stems), TITLE_BATCH):
+        batch = stems[i : i + TITLE_BATCH]
+        rows = (
+            client.table(table)
+            .select(f"id, {title_column}")
+            .or_(",".join(f"{title_column}.ilike.{_like_exact(s)}" for s in batch))
+            .execute()
+            .data
+        )
+        for stem in batch:
+            pattern = re.compile(
+                "^" + re.escape(stem).replace("_", ".") + "$", re.IGNORECASE
+            )
+            ids = [
+                str(row["id"])
+                for row in rows
+                if row.get(title_column) and pattern.match(row[title_column])
+            ]
+            by_title[stem] = ids
+
+    matches, claimed = [], set()
+    for name in names:
+        ids = by_title.get(_stem(name), [])
+        if name in exact and prefixes[name] in known:
+            record_id, reason = prefixes[name], "id"
+        elif len(ids) == 1:
+            record_id, reason = ids[0], "title"
+        elif prefixes.get(name) in known:
+            record_id, reason = prefixes[name], "id"
+        else:
+            reason = "no matching record" if not ids else "title is ambiguous"
+            matches.append(Match(name, None, reason))
+            continue
+        if record_id in claimed:
+            matches.append(Match(name, None, "record matched by another file"))
+            continue
+        claimed.add(record_id)
+        matches.append(Match(name, record_id, reason))
+    return matches
+
+
+def stored_checksums(client: Client, table: str, ids: list) -> dict:
+    """Returns ``{id: file_checksum}`` of the records that have one stored."""
+    if not ids:
+        return {}
+    rows = (
+        client.table(table)
+        .select("id, file_checksum")
+        .in_("id", sorted(set(ids)))
+        .execute()
+        .data
+    )
+    return {str(r["id"]): r["file_checksum"] for r in rows if r.get("file_checksum")}
+
+
+def upload_records(uploads: dict, uploaded_time: str) -> list:
+    """Builds update records storing ``{id: UploadResult}`` on their records."""
+    return [
+        {
+            "id": record_id,
+            "uploaded_time": uploaded_time,
+            "file_checksum": result.checksum,
+            "file_size": result.size,
+        }
+        for record_id, result in uploads.items()
+    ]
+
+
+def upload_files(files: dict, dest_path: str, on_done=None) -> dict:
+    """Uploads ``{nas_file_name: (stream, known_checksum)}`` concurrently.
+
+    Transfers run on at most ``MAX_SPOOLS`` threads, the same bound the NAS
+    session pool and the spool use; files whose content matches their known
+    checksum are hashed but not transferred. ``on_done(name, ok)`` is called
+    on the calling thread as each file finishes. Returns
+    ``{name: (UploadResult or None, error or None)}``.
+    """
+    results = {}
+    if not files:
+        return results
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_SPOOLS, len(files)), thread_name_prefix="nas-upload"
+    ) as executor:
+        futures = {
+            executor.submit(
+                upload_stream, stream, name, dest_path, known_checksum=checksum
+            ): name
+            for name, (stream, checksum) in files.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+                error = None if result.ok else "the NAS did not accept the file"
+                results[name] = (result, error)
+            except Exception as e:
+                results[name] = (None, str(e))
+            if on_done is not None:
+                on_done(name, results[name][1] is None)
+    return results
+
+
+def run_bulk_upload(
+    client: Client,
+    table: str,
+    title_column: str,
+    files: list,
+    dest_path: str,
+    record,
+    report=None,
+) -> pd.DataFrame:
+    """Matches, uploads and records ``[(file_name, stream)]``.
+
+    ``record({id: UploadResult})`` stores the confirmed uploads in one write
+    and returns the ids whose records no longer exist.
+    Returns one row per file with its record, match reason and status, and
+    raises ``RuntimeError`` after recording if any transfer failed, so the
+    job can be retried; files already recorded are then skipped by checksum.
+    """
+    report = report or (lambda fraction, message=None: None)
+    matches = match_files(client, table, title_column, [name for name, _ in files])
+    # 已存储校验和的记录，内容未变的文件只计算哈希不传输
+    known = stored_checksums(
+        client, table, [m.record_id for m in matches if m.record_id is not None]
+    )
+
+    # NAS 上的文件名为记录 ID 加原扩展名
+    streams, targets = {}, {}
+    for (file_name, stream), match in zip(files, matches):
+        if match.record_id is None:
+            continue
+        nas_name = f"{match.record_id}{os.path.splitext(file_name)[1]}"
+        stream.seek(0)
+        streams[nas_name] = (stream, known.get(match.record_id))
+        targets[match.file_name] = nas_name
+
+    done = []
+
+    def on_done(name, ok):
+        done.append(name)
+        report(len(done) / len(streams), f"{len(done)} / {len(streams)} files")
+
+    results = upload_files(streams, dest_path, on_done=on_done)
+
+    # 只为 NAS 已确认的文件更新上传时间，一次批量写入
+    uploaded, failed = {}, []
+    for match in matches:
+        if match.record_id is None:
+            continue
+        result, error = results[targets[match.file_name]]
+        if error is not None:
+            failed.append((match.file_name, error))
+        elif not result.skipped:
+            uploaded[match.record_id] = result
+    # 上传期间被删除的记录
+    deleted = set(record(uploaded) or ()) if uploaded else set()
+
+    def status(match):
+        if match.record_id is None:
+            return match.reason
+        result, error = results[targets[match.file_name]]
+        if error:
+            return error
+        if match.record_id in deleted:
+            return "record deleted during upload"
+        return "unchanged" if result.skipped else "uploaded"
+
+    if failed:
+        name, error = failed[0]
+        raise RuntimeError(
+            f"{len(failed)} of {len(streams)} files failed, e.g. {name}: {error}"
+        )
+    return pd.DataFrame(
+        {
+            "file": [m.file_name for m in matches],
+            "record": [m.record_id for m in matches],
+            "matched by": [m.reason if m.record_id else "" for m in matches],
+            "status": [status(m) for m in matches],
+        }
+    )
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+
+from supabase import Client
+
+from module.frame_diff import ChangeSet
+from module.mirror import apply_to_mirror
+from module.row_count import adjust_row_count
+from module.versions import bump_table_version
+
+# 按 ID 查询时每个请求的 ID 数，避免 URL 过长
+ID_BATCH = 200
+
+
+@dataclass
+class CommitResult:
+    """Outcome of :func:`commit_changes`, reported per row id."""
+
+    inserted: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    # rows returned by the updates and insert
+    rows: list = field(default_factory=list)
+    # (operation, row ids or None for new rows, error message)
+    failed: list = field(default_factory=list)
+    requests: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def summary(self) -> str:
+        text = (
+            f"{len(self.inserted)} created, {len(self.updated)} updated, "
+            f"{len(self.deleted)} deleted in {self.requests} requests"
+        )
+        if self.failed:
+            text += f", {len(self.failed)} operations failed"
+        return text
+
+
+def _returned_ids(rows: list, key: str) -> list:
+    return [str(row[key]) for row in rows]
+
+
+def group_updates(records: list, key: str = "id") -> list:
+    """Groups ``[{key, column: value}]`` by identical column values.
+
+    Returns ``[(values, ids)]``; each group can be written with one
+    ``update(values).in_(key, ids)`` request that sends only its columns.
+    """
+    groups = {}
+    for record in records:
+        values = {c: v for c, v in record.items() if c != key}
+        if not values:
+            continue
+        ids = groups.setdefault(tuple(sorted(values.items())), (values, []))[1]
+        ids.append(str(record[key]))
+    return list(groups.values())
+
+
+def _batches(ids: list) -> list:
+    return [ids[i : i + ID_BATCH] for i in range(0, len(ids), ID_BATCH)]
+
+
+def update_rows(
+    client: Client, table: str, records: list, key: str = "id"
+) -> tuple:
+    """Updates existing rows of ``table``; never inserts.
+
+    Each record holds ``key`` plus the columns to change; only those columns
+    are sent, one request per group of identical values (see
+    :func:`group_updates`). Records of rows deleted meanwhile match nothing
+    and are not re-created. The updated rows are applied to the table's
+    mirror. Returns ``(updated rows, missing ids)``.
+    """
+    rows, sent = [], set()
+    for values, ids in group_updates(records, key):
+        for batch in _batches(ids):
+            response = client.table(table).update(values).in_(key, batch).execute()
+            rows.extend(response.data)
+        sent.update(ids)
+    apply_to_mirror(table, rows)
+    return rows, sorted(sent - set(_returned_ids(rows, key)))
+
+
+def commit_changes(
+    client: Client, table: str, changes: ChangeSet, key: str = "id"
+) -> CommitResult:
+    """Writes a change set with grouped updates, one delete and one insert.
+
+    Each update sends only the changed columns; rows given the same values
+    share one request (see :func:`group_updates`). Operations run
+    independently, so a failing delete does not prevent the updates from
+    being saved. Rows the database did not return are reported
+    as failed. The table's mirror is updated and its data version bumped
+    once for the whole commit.
+    """
+    result = CommitResult()
+
+    updates = changes.update_records(key)
+    if updates:
+        missing = set()
+        for values, ids in group_updates(updates, key):
+            for batch in _batches(ids):
+                try:
+                    response = (
+                        client.table(table).update(values).in_(key, batch).execute()
+                    )
+                    updated = _returned_ids(response.data, key)
+                    result.updated.extend(updated)
+                    result.rows.extend(response.data)
+                    # 只更新仍存在的记录，被其他会话删除的记录不会被重新创建
+                    missing.update(set(batch) - set(updated))
+                except Exception as e:
+                    result.failed.append(("update", batch, str(e)))
+                result.requests += 1
+        if missing:
+            result.failed.append(("update", sorted(missing), "record not found"))
+
+    if changes.deleted:
+        try:
+            response = (
+                client.table(table).delete().in_(key, changes.deleted).execute()
+            )
+            result.deleted = _returned_ids(response.data, key)
+            missing = sorted(set(changes.deleted) - set(result.deleted))
+            if missing:
+                result.failed.append(("delete", missing, "record not found"))
+        except Exception as e:
+            result.failed.append(("delete", list(changes.deleted), str(e)))
+        result.requests += 1
+
+    inserts = changes.insert_records()
+    if inserts:
+        try:
+            response = client.table(table).insert(inserts).execute()
+            result.inserted = _returned_ids(response.data, key)
+            result.rows.extend(response.data)
+        except Exception as e:
+            result.failed.append(("insert", None, str(e)))
+        result.requests += 1
+
+    adjust_row_count(table, len(result.inserted) - len(result.deleted))
+    apply_to_mirror(table, result.rows, result.deleted)
+    if result.requests:
+        bump_table_version(table)
+    return result
@@ -0,0 +1,83 @@
+import threading
+
+import streamlit as st
+from supabase import Client, ClientOptions, create_client
+
+from module.offline import offline_backend
+
+_lock = threading.Lock()
+_stats = {
+    "clients_created": 0,
+    "client_lookups": 0,
+    "requests": 0,
+    "request_errors": 0,
+}
+
+
+def _count(key: str, step: int = 1):
+    with _lock:
+        _stats[key] += step
+
+
+def _on_request(error: bool):
+    _count("requests")
+    if error:
+        _count("request_errors")
+
+
+def _on_response(response):
+    _on_request(response.is_error)
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_client() -> Client:
+    """Builds the single Supabase client shared by every session and page."""
+    backend = offline_backend()
+    if backend is not None:
+        # 离线模式使用进程内的模拟数据库
+        _count("clients_created")
+        return backend.client(on_request=_on_request)
+    client = create_client(
+        st.secrets.supabase.url,
+        st.secrets.supabase.key,
+        options=ClientOptions(postgrest_client_timeout=30),
+    )
+    # postgrest 客户端是惰性创建的，这里提前初始化，避免多线程同时创建
+    session = client.postgrest.session
+    session.event_hooks["response"].append(_on_response)
+    _count("clients_created")
+    return client
+
+
+def get_client() -> Client:
+    """Returns the process-wide Supabase client.
+
+    The underlying httpx session keeps connections alive, so reruns and
+    concurrent sessions reuse open TLS connections instead of handshaking
+    again on every widget interaction.
+    """
+    _count("client_lookups")
+    return _shared_client()
+
+
+def _open_connections(client: Client) -> int:
+    if not hasattr(client, "postgrest"):
+        # 模拟客户端没有连接池
+        return 0
+    # httpx 不公开连接池信息，只能读取 transport 内部的 httpcore 连接池
+    pool = getattr(client.postgrest.session._transport, "_pool", None)
+    if pool is None:
+        return 0
+    return sum(1 for conn in pool.connections if not conn.is_closed())
+
+
+def pool_stats() -> dict:
+    """Returns counters for the shared client and its connection pool."""
+    with _lock:
+        stats = dict(_stats)
+    stats["client_reuses"] = max(0, stats["client_lookups"] - stats["clients_created"])
+    if stats["clients_created"]:
+        stats["open_connections"] = _open_connections(_shared_client())
+    else:
+        stats["open_connections"] = 0
+    return stats
@@ -0,0 +1,268 @@
+import asyncio
+import re
+import time
+from typing import NamedTuple
+
+import streamlit as st
+from langgraph.pregel.remote import RemoteGraph
+from supabase import Client
+
+from module.agent_cache import AgentCache
+from module.offline import offline_backend
+
+GRAPH_NAME = "esg_search_agent"
+# 同时进行的查询数和每分钟发起的查询数，可在 secrets 的 [langgraph] 中配置
+CONCURRENCY = 8
+RATE_PER_MINUTE = 60
+TIMEOUT = 300
+MAX_ATTEMPTS = 3
+BATCH_SIZE = 1000
+
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>()\[\]{}]+")
+
+
+class Query(NamedTuple):
+    """One company/year lookup; ``record_id`` is the esg_meta row it is for."""
+
+    company: str
+    year: int = None
+    record_id: str = None
+
+    @property
+    def text(self) -> str:
+        return query_text(self.company, self.year)
+
+
+class AgentResult(NamedTuple):
+    """Outcome of one query; ``output`` is the graph's final state."""
+
+    query: Query
+    output: dict = None
+    error: str = None
+    elapsed: float = 0.0
+    attempts: int = 0
+    # 结果来自缓存，未调用智能体
+    cached: bool = False
+
+    @property
+    def answer(self) -> str:
+        """Content of the last message in the final state."""
+        messages = (self.output or {}).get("messages") or []
+        if not messages:
+            return None
+        last = messages[-1]
+        return last.get("content") if isinstance(last, dict) else last.content
+
+
+def iter_strings(value):
+    """Yields every string nested in an agent state or state update."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from iter_strings(item)
+    elif hasattr(value, "content"):
+        yield from iter_strings(value.content)
+
+
+def find_urls(value):
+    """Yields the URLs mentioned anywhere in ``value``, with their text."""
+    for text in iter_strings(value):
+        for match in URL_PATTERN.finditer(text):
+            yield match.group(0).rstrip(".,;:"), text, match
+
+
+def report_url(output: dict) -> str:
+    """Picks the report URL from a final state.
+
+    A ``report_url`` field wins; otherwise the first PDF link, otherwise the
+    first link in the state.
+    """
+    if isinstance(output, dict) and isinstance(output.get("report_url"), str):
+        return output["report_url"]
+    urls = [url for url, _, _ in find_urls(output)]
+    pdfs = [url for url in urls if url.lower().split("?")[0].endswith(".pdf")]
+    return (pdfs or urls or [None])[0]
+
+
+def query_text(company: str, year: int = None) -> str:
+    return f"{company.strip()} {year}" if year else company.strip()
+
+
+def agent_settings() -> dict:
+    settings = st.secrets.get("langgraph", {})
+    return {
+        "concurrency": int(settings.get("concurrency", CONCURRENCY)),
+        "rate_per_minute": float(settings.get("rate_per_minute", RATE_PER_MINUTE)),
+    }
+
+
+def new_remote_graph(graph_name: str = GRAPH_NAME) -> RemoteGraph:
+    backend = offline_backend()
+    if backend is not None:
+        return backend.remote_graph(graph_name)
+    return RemoteGraph(
+        graph_name,
+        url=st.secrets["langgraph"]["url"],
+        api_key=st.secrets["langgraph"]["api_key"],
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_remote_graph(graph_name: str = GRAPH_NAME) -> RemoteGraph:
+    """Returns the process-wide client of the deployed agent graph.
+
+    Its async HTTP client belongs to the first event loop that uses it;
+    code running its own loop per call should use :func:`new_remote_graph`.
+    """
+    return new_remote_graph(graph_name)
+
+
+class RateLimiter:
+    """Spaces call starts at least ``60 / rate_per_minute`` seconds apart."""
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _invoke(graph: RemoteGraph, query: Query, limiter: RateLimiter):
+    start = time.monotonic()
+    error = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.wait()
+        try:
+            output = await asyncio.wait_for(
+                graph.ainvoke(
+                    {"messages": [{"role": "user", "content": query.text}]}
+                ),
+                TIMEOUT,
+            )
+            return AgentResult(
+                query, output, elapsed=time.monotonic() - start, attempts=attempt
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt < MAX_ATTEMPTS:
+                await asyncio.sleep(2**attempt)
+    return AgentResult(
+        query, error=error, elapsed=time.monotonic() - start, attempts=MAX_ATTEMPTS
+    )
+
+
+async def run_query(
+    graph: RemoteGraph,
+    query: Query,
+    limiter: RateLimiter,
+    graph_name: str = GRAPH_NAME,
+    cache: AgentCache = None,
+):
+    """Runs one query with retries; errors are returned, not raised.
+
+    With a ``cache``, stored results are returned without calling the graph,
+    identical queries in flight share one call and successful outputs are
+    stored.
+    """
+    if cache is None:
+        return await _invoke(graph, query, limiter)
+    start = time.monotonic()
+    output = cache.get(graph_name, query.text)
+    if output is not None:
+        return AgentResult(query, output, elapsed=time.monotonic() - start, cached=True)
+
+    async def call():
+        result = await _invoke(graph, query, limiter)
+        if result.error is None:
+            cache.put(graph_name, query.text, result.output)
+        return result
+
+    result = await cache.single_flight(graph_name, query.text, call)
+    # 合并的请求共用结果，但保留各自的记录 ID
+    return result._replace(query=query)
+
+
+async def run_batch(
+    queries,
+    graph: RemoteGraph = None,
+    concurrency: int = CONCURRENCY,
+    rate_per_minute: float = RATE_PER_MINUTE,
+    on_result=None,
+    graph_name: str = GRAPH_NAME,
+    cache: AgentCache = None,
+) -> list:
+    """Runs ``queries`` through the agent graph concurrently.
+
+    At most ``concurrency`` queries are in flight and at most
+    ``rate_per_minute`` are started per minute; queries answered from
+    ``cache`` count against neither. ``queries`` may be a lazy iterable; it
+    is consumed on a worker thread as workers become free, so blocking
+    batch reads do not stall queries in flight. ``on_result(result)`` is
+    called as each query finishes. Returns the results in completion order.
+    """
+    graph = graph or get_remote_graph(graph_name)
+    limiter = RateLimiter(rate_per_minute)
+    pending = iter(queries)
+    # 生成器一次只能由一个线程推进
+    pending_lock = asyncio.Lock()
+    results = []
+
+    async def next_query():
+        # 惰性生成器会分批查询 Supabase 或 SQLite，在线程中读取，不阻塞进行中的查询
+        async with pending_lock:
+            return await asyncio.to_thread(next, pending, None)
+
+    async def worker():
+        while True:
+            query = await next_query()
+            if query is None:
+                return
+            result = await run_query(graph, query, limiter, graph_name, cache)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results
+
+
+def missing_report_queries(client: Client, limit: int = None):
+    """Yields a query for every esg_meta row without a ``report_url``.
+
+    Rows are read by id in batches of ``BATCH_SIZE``; the year comes from
+    ``publication_date``.
+    """
+    last_id = None
+    produced = 0
+    while True:
+        query = (
+            client.table("esg_meta")
+            .select("id, company_name, publication_date")
+            .is_("report_url", "null")
+            .not_.is_("company_name", "null")
+            .order("id")
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data
+        for row in rows:
+            date = row.get("publication_date")
+            yield Query(row["company_name"], int(date[:4]) if date else None, row["id"])
+            produced += 1
+            if limit is not None and produced >= limit:
+                return
+        if len(rows) < BATCH_SIZE:
+            return
+        last_id = rows[-1]["id"]
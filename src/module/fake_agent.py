@@ -0,0 +1,91 @@
+import asyncio
+import random
+import re
+
+from module.agent_cache import normalize_query
+
+# 模拟智能体依次经过的节点
+NODES = ("plan", "search", "extract")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "company"
+
+
+class FakeRemoteGraph:
+    """Stand-in for a deployed agent graph that answers with made-up reports.
+
+    The answer depends only on ``seed`` and the normalized query, so a query
+    always finds the same URL, or nothing for about ``1 - hit_rate`` of the
+    queries. A run takes ``faults.delay()`` seconds, spread over ``NODES``,
+    and raises ``ConnectionError`` at a random node when ``faults.failed()``.
+    """
+
+    def __init__(
+        self, graph_name: str, faults, seed: int = 0, hit_rate: float = 0.9
+    ):
+        self.name = graph_name
+        self.faults = faults
+        self.seed = seed
+        self.hit_rate = hit_rate
+
+    def _steps(self, text: str) -> list:
+        """Returns ``(node, message, state fields)`` of the run answering ``text``."""
+        rng = random.Random(f"{self.seed}:{normalize_query(text)}")
+        company, _, year = text.rpartition(" ")
+        if not year.isdigit():
+            company, year = text, None
+        slug = _slug(company)
+        home = f"https://www.{slug}.example.com/"
+        steps = [
+            ("plan", f"Searching for the ESG report of {text}", {}),
+            ("search", f"Found the investor relations page {home}", {}),
+        ]
+        if rng.random() < self.hit_rate:
+            url = f"https://reports.example.com/{slug}/{year or 'latest'}.pdf"
+            steps.append(
+                ("extract", f"The report is available at {url}", {"report_url": url})
+            )
+        else:
+            steps.append(("extract", "No sustainability report was found.", {}))
+        return steps
+
+    async def _run(self, input: dict):
+        messages = list(input.get("messages", []))
+        last = messages[-1] if messages else {}
+        text = last.get("content", "") if isinstance(last, dict) else str(last)
+        steps = self._steps(text)
+        delay = self.faults.delay() / len(steps)
+        failing = random.randrange(len(steps)) if self.faults.failed() else None
+        state = {"messages": messages}
+        for i, (node, message, fields) in enumerate(steps):
+            await asyncio.sleep(delay)
+            if i == failing:
+                raise ConnectionError(f"injected failure in node {node}")
+            update = {"messages": [{"role": "assistant", "content": message}]}
+            update.update(fields)
+            state = {
+                **state,
+                **fields,
+                "messages": state["messages"] + update["messages"],
+            }
+            yield node, update, state
+
+    async def ainvoke(self, input: dict, config: dict = None, **kwargs) -> dict:
+        state = None
+        async for _, _, state in self._run(input):
+            pass
+        return state
+
+    async def astream(
+        self, input: dict, config: dict = None, stream_mode="values", **kwargs
+    ):
+        """Yields chunks like ``RemoteGraph.astream``.
+
+        With a list of modes, chunks come as ``(mode, chunk)`` pairs.
+        """
+        modes = [stream_mode] if isinstance(stream_mode, str) else list(stream_mode)
+        async for node, update, state in self._run(input):
+            for mode, chunk in (("updates", {node: update}), ("values", state)):
+                if mode in modes:
+                    yield chunk if isinstance(stream_mode, str) else (mode, chunk)
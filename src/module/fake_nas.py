@@ -0,0 +1,167 @@
+import os
+import random
+import threading
+import time
+
+from synology_api.exceptions import FileStationError
+
+# 会话已过期、文件操作失败、路径不存在
+SESSION_EXPIRED = 119
+UPLOAD_FAILED = 401
+NOT_FOUND = 408
+# 种子数据中有问题的文件比例，供完整性检查使用
+PROBLEM_RATE = 0.01
+
+
+class FakeNas:
+    """In-memory file tree of a FileStation share: ``{folder: {name: size}}``.
+
+    ``faults`` delays and fails requests; ``session_error_rate`` is the
+    chance that a request finds its session expired, after which the
+    session keeps failing until it is replaced. Uploads also take
+    ``size / bandwidth`` seconds when ``bandwidth`` (bytes per second) is set.
+    """
+
+    def __init__(
+        self, faults, session_error_rate: float = 0.0, bandwidth: float = 0
+    ):
+        self.faults = faults
+        self.session_error_rate = session_error_rate
+        self.bandwidth = bandwidth
+        self._folders = {}
+        # 按名称排序的目录列表缓存，写入时失效
+        self._sorted = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.seeded = False
+
+    def seed(self, files: dict, seed: int = 0):
+        """Stores ``{folder: [(record id, size)]}`` as ``<id>.pdf`` files.
+
+        About ``PROBLEM_RATE`` of the records are missing, have the wrong
+        size, have a second file, or are joined by an orphaned file.
+        """
+        rng = random.Random(f"{seed}:nas")
+        with self._lock:
+            for folder, records in files.items():
+                entries = self._folders.setdefault(folder, {})
+                orphan = max((int(i) for i, _ in records), default=0)
+                for record_id, size in records:
+                    size = size or 0
+                    roll = rng.random() / PROBLEM_RATE
+                    if roll < 1:
+                        continue
+                    entries[f"{record_id}.pdf"] = size + 1 if roll < 2 else size
+                    if 2 <= roll < 3:
+                        entries[f"{record_id}.docx"] = size // 2
+                    elif 3 <= roll < 4:
+                        orphan += 1
+                        entries[f"{orphan}.pdf"] = size
+                self._sorted.pop(folder, None)
+            self.seeded = True
+
+    def session(self):
+        return FakeFileStation(self)
+
+    def store(self, folder: str, name: str, size: int, create: bool) -> bool:
+        with self._lock:
+            if folder not in self._folders and not create:
+                return False
+            self._folders.setdefault(folder, {})[name] = size
+            self._sorted.pop(folder, None)
+            return True
+
+    def listing(self, folder: str) -> list:
+        with self._lock:
+            if folder not in self._folders:
+                return None
+            if folder not in self._sorted:
+                self._sorted[folder] = sorted(self._folders[folder].items())
+            return self._sorted[folder]
+
+    def session_expires(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.session_error_rate
+
+
+class FakeFileStation:
+    """One logged-in session on a :class:`FakeNas`.
+
+    Mirrors synology_api's ``FileStation``: a failed upload returns
+    ``(status_code, response)`` and other failures raise ``FileStationError``.
+    """
+
+    def __init__(self, nas: FakeNas):
+        self._nas = nas
+        self._expired = False
+
+    def _error(self) -> int:
+        """Waits like a request and returns the error code it fails with."""
+        time.sleep(self._nas.faults.delay())
+        if self._expired or self._nas.session_expires():
+            self._expired = True
+            return SESSION_EXPIRED
+        if self._nas.faults.failed():
+            return UPLOAD_FAILED
+        return None
+
+    def upload_file(
+        self,
+        dest_path: str,
+        file_path: str,
+        create_parents: bool = True,
+        overwrite: bool = True,
+        verify: bool = False,
+        progress_bar: bool = True,
+    ):
+        code = self._error()
+        if code is not None:
+            return 200, {"error": {"code": code}, "success": False}
+        size = os.path.getsize(file_path)
+        if self._nas.bandwidth:
+            time.sleep(size / self._nas.bandwidth)
+        name = os.path.basename(file_path)
+        if not self._nas.store(dest_path, name, size, create_parents):
+            return 200, {"error": {"code": NOT_FOUND}, "success": False}
+        return {
+            "data": {"blSkip": False, "file": name, "progress": 100},
+            "success": True,
+        }
+
+    def get_file_list(
+        self,
+        folder_path: str,
+        offset: int = None,
+        limit: int = None,
+        sort_by: str = None,
+        sort_direction: str = None,
+        pattern: str = None,
+        filetype: str = None,
+        goto_path: str = None,
+        additional: list = None,
+    ) -> dict:
+        code = self._error()
+        if code is not None:
+            raise FileStationError(error_code=code)
+        listing = self._nas.listing(folder_path)
+        if listing is None:
+            raise FileStationError(error_code=NOT_FOUND)
+        start = offset or 0
+        end = start + limit if limit else len(listing)
+        files = [
+            {
+                "name": name,
+                "path": f"{folder_path}/{name}",
+                "isdir": False,
+                "additional": {"size": size},
+            }
+            for name, size in listing[start:end]
+        ]
+        return {
+            "data": {"files": files, "offset": start, "total": len(listing)},
+            "success": True,
+        }
+
+    def logout(self):
+        self._expired = True
+        return {"success": True}
@@ -0,0 +1,656 @@
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+
+from postgrest.exceptions import APIError
+
+from module.schema import TABLES
+
+# 上传文件的表额外记录的列
+FILE_COLUMNS = ("file_checksum", "file_size")
+# 不带写入时间的列由模拟的数据库默认值和触发器填写
+CREATED_COLUMN = "created_time"
+UPDATED_COLUMN = "last_updated_time"
+
+SEED_BATCH = 10_000
+
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+_PREFIXES = (
+    "China",
+    "Hong Kong",
+    "Japan",
+    "Pacific",
+    "Golden",
+    "Eastern",
+    "Northern",
+    "Southern",
+    "Great Wall",
+    "Sun",
+    "Star",
+    "Green",
+    "Ocean",
+    "Harbour",
+    "Jade",
+)
+_CORES = (
+    "Energy",
+    "Steel",
+    "Bank",
+    "Telecom",
+    "Pharma",
+    "Logistics",
+    "Foods",
+    "Motors",
+    "Materials",
+    "Power",
+    "Chemicals",
+    "Insurance",
+    "Shipping",
+    "Property",
+    "Electronics",
+    "Textiles",
+    "Cement",
+    "Airlines",
+)
+_SUFFIXES = ("Group", "Co., Ltd.", "Corporation", "Holdings", "Limited")
+_REPORTS = (
+    "ESG Report",
+    "Sustainability Report",
+    "CSR Report",
+    "Environmental, Social and Governance Report",
+)
+_ORGANIZATIONS = ("ISO", "GRI", "IFRS", "SASB", "TCFD", "CDP", "UNEP", "HKEX", "CSRC")
+_TOPICS = (
+    "Carbon Accounting",
+    "Water Stewardship",
+    "Climate Risk",
+    "Biodiversity",
+    "Circular Economy",
+    "Supply Chain",
+    "Human Rights",
+    "Emissions Disclosure",
+)
+_TAGS = ("policy", "guideline", "training", "template", "memo", "research")
+_FILE_TYPES = ("pdf", "docx", "xlsx", "pptx")
+
+
+class FakeResponse(NamedTuple):
+    """The parts of a postgrest ``APIResponse`` the app reads."""
+
+    data: list
+    count: int = None
+
+
+def _error(message: str, code: str = "PGRST000") -> APIError:
+    return APIError({"message": message, "code": code, "hint": None, "details": None})
+
+
+def _split(text: str) -> list:
+    """Splits a PostgREST logic expression at top-level commas."""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\" and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _unquote(value: str) -> str:
+    if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+        return value
+    text, escaped = [], False
+    for char in value[1:-1]:
+        if escaped or char != "\\":
+            text.append(char)
+            escaped = False
+        else:
+            escaped = True
+    return "".join(text)
+
+
+def _quoted(names) -> str:
+    return ", ".join(f'"{name}"' for name in names)
+
+
+def _placeholders(values) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def _like(pattern: str) -> str:
+    # PostgREST 允许用 * 代替 %
+    return pattern.replace("*", "%")
+
+
+def _random_day(rng: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _timestamp(day: date, rng: random.Random) -> str:
+    moment = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return (moment + timedelta(seconds=rng.randrange(86400))).isoformat()
+
+
+def _company(rng: random.Random) -> str:
+    return f"{rng.choice(_PREFIXES)} {rng.choice(_CORES)} {rng.choice(_SUFFIXES)}"
+
+
+def _seed_row(table: str, row_id: int, rng: random.Random) -> dict:
+    """Builds one plausible row of ``table``; about 70% have an uploaded file."""
+    day = _random_day(rng, date(2010, 1, 1), date(2025, 6, 30))
+    created = day + timedelta(days=rng.randrange(0, 60))
+    row = {"id": row_id}
+    if table == "esg_meta":
+        company = _company(rng)
+        row.update(
+            country=rng.choice(("CHN", "HKG", "JPN")),
+            company_name=company,
+            report_title=f"{company} {day.year} {rng.choice(_REPORTS)}",
+            publication_date=day.isoformat(),
+            language=rng.choice(("eng", "chi_sim", "chi_tra", "jpn")),
+            # 约三成记录没有报告链接，供智能体检索
+            report_url=(
+                f"https://reports.example.com/esg/{row_id}.pdf"
+                if rng.random() < 0.7
+                else None
+            ),
+        )
+    elif table == "reports":
+        row.update(
+            title=f"{rng.choice(_TOPICS)} Outlook {day.year}",
+            issuing_organization=rng.choice(_ORGANIZATIONS),
+            release_date=day.isoformat(),
+            language=rng.choice(("eng", "chi_sim")),
+            url=f"https://reports.example.com/reports/{row_id}.pdf",
+        )
+    elif table == "standards":
+        organization = rng.choice(_ORGANIZATIONS)
+        row.update(
+            title=f"{organization} Standard on {rng.choice(_TOPICS)}",
+            issuing_organization=organization,
+            effective_date=day.isoformat(),
+            expiration_date=(
+                (day + timedelta(days=365 * rng.randint(3, 10))).isoformat()
+                if rng.random() < 0.5
+                else None
+            ),
+            standard_number=f"{organization} {rng.randint(1, 999)}:{day.year}",
+            url=f"https://standards.example.com/{row_id}.pdf",
+        )
+    else:
+        row.update(
+            tag=rng.choice(_TAGS),
+            title=f"{rng.choice(_TOPICS)} {rng.choice(_TAGS).title()} {row_id}",
+            file_type=rng.choice(_FILE_TYPES),
+        )
+    columns = {column.name for column in TABLES[table]}
+    if CREATED_COLUMN in columns:
+        row[CREATED_COLUMN] = _timestamp(created, rng)
+    if UPDATED_COLUMN in columns:
+        updated = created + timedelta(days=rng.randrange(90))
+        row[UPDATED_COLUMN] = _timestamp(updated, rng)
+    if rng.random() < 0.7:
+        row["uploaded_time"] = _timestamp(created, rng)
+        row["file_size"] = rng.randint(100_000, 20_000_000)
+        row["file_checksum"] = f"{rng.getrandbits(256):064x}"
+    return row
+
+
+class FakeDatabase:
+    """In-memory SQLite copy of the admin tables, seeded with generated rows.
+
+    Every table in :data:`module.schema.TABLES` gets ``rows`` rows on first
+    use; the same ``seed`` always produces the same data.
+    """
+
+    def __init__(self, rows: int = 100_000, seed: int = 0):
+        self.rows = rows
+        self.seed = seed
+        self.columns = {
+            table: [column.name for column in columns] + list(FILE_COLUMNS)
+            for table, columns in TABLES.items()
+        }
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._seeded = set()
+
+    def column(self, table: str, name: str) -> str:
+        """Returns the quoted column name, or raises like PostgREST."""
+        if name not in self.columns.get(table, ()):
+            raise _error(f"column {table}.{name} does not exist", "42703")
+        return f'"{name}"'
+
+    def ensure(self, table: str):
+        if table not in self.columns:
+            raise _error(f"relation public.{table} does not exist", "42P01")
+        with self.lock:
+            if table in self._seeded:
+                return
+            definitions = ", ".join(
+                '"id" INTEGER PRIMARY KEY AUTOINCREMENT'
+                if name == "id"
+                else f'"{name}" {"INTEGER" if name == "file_size" else "TEXT"}'
+                for name in self.columns[table]
+            )
+            with self.conn:
+                self.conn.execute(f'CREATE TABLE "{table}" ({definitions})')
+                self._seed(table)
+                # 每个可排序的列都带 id 建索引，与键集分页的查询一致
+                for name in self.columns[table][1:]:
+                    self.conn.execute(
+                        f'CREATE INDEX "{table}_{name}" '
+                        f'ON "{table}" ("{name}", "id")'
+                    )
+            self._seeded.add(table)
+
+    def uploaded_files(self, table: str) -> list:
+        """Returns ``(id, file_size)`` of the rows marked as uploaded."""
+        self.ensure(table)
+        with self.lock:
+            return self.conn.execute(
+                f'SELECT id, file_size FROM "{table}" '
+                "WHERE uploaded_time IS NOT NULL ORDER BY id"
+            ).fetchall()
+
+    def _seed(self, table: str):
+        rng = random.Random(f"{self.seed}:{table}")
+        columns = self.columns[table]
+        sql = (
+            f'INSERT INTO "{table}" ({_quoted(columns)}) '
+            f"VALUES ({_placeholders(columns)})"
+        )
+        for start in range(1, self.rows + 1, SEED_BATCH):
+            batch = [
+                _seed_row(table, row_id, rng)
+                for row_id in range(start, min(start + SEED_BATCH, self.rows + 1))
+            ]
+            self.conn.executemany(
+                sql, [tuple(row.get(c) for c in columns) for row in batch]
+            )
+
+
+class FakeQuery:
+    """The subset of the postgrest-py request builder used by the app.
+
+    Filters, ordering and ranges are translated to SQL on the in-memory
+    database. Row counts are always exact, also for ``planned`` and
+    ``estimated``.
+    """
+
+    def __init__(self, client, table: str):
+        self._client = client
+        self._db = client.db
+        self._table = table
+        self._method = "select"
+        self._columns = "*"
+        self._count = None
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+        self._payload = None
+        self._on_conflict = "id"
+        self._default_to_null = True
+        self._negate = False
+
+    # 请求类型
+
+    def select(self, *columns, count: str = None):
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        return self
+
+    def insert(self, json, count: str = None, default_to_null: bool = True):
+        self._method = "insert"
+        self._payload = [json] if isinstance(json, dict) else list(json)
+        self._default_to_null = default_to_null
+        return self
+
+    def upsert(
+        self,
+        json,
+        count: str = None,
+        on_conflict: str = "",
+        default_to_null: bool = True,
+        ignore_duplicates: bool = False,
+    ):
+        self._method = "upsert"
+        self._payload = [json] if isinstance(json, dict) else list(json)
+        self._on_conflict = on_conflict or "id"
+        self._default_to_null = default_to_null
+        return self
+
+    def update(self, json: dict, count: str = None):
+        self._method = "update"
+        self._payload = [json]
+        return self
+
+    def delete(self, count: str = None):
+        self._method = "delete"
+        return self
+
+    # 过滤条件
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def _filter(self, clause: str, params: list):
+        if self._negate:
+            clause = f"NOT ({clause})"
+            self._negate = False
+        self._where.append(clause)
+        self._params.extend(params)
+        return self
+
+    def _condition(self, column: str, op: str, value) -> tuple:
+        name = self._db.column(self._table, column)
+        if op in _OPERATORS:
+            return f"{name} {_OPERATORS[op]} ?", [value]
+        if op in ("like", "ilike"):
+            # SQLite 的 LIKE 本身不区分 ASCII 大小写
+            return f"{name} LIKE ? ESCAPE '\\'", [_like(value)]
+        if op == "is":
+            if str(value).lower() == "null":
+                return f"{name} IS NULL", []
+            return f"{name} = ?", [1 if str(value).lower() == "true" else 0]
+        if op == "in":
+            values = list(value)
+            if not values:
+                return "0", []
+            return f"{name} IN ({_placeholders(values)})", values
+        if op in ("fts", "plfts", "phfts", "wfts"):
+            # 全文检索以逐词子串匹配近似
+            clauses, params = [], []
+            for word in str(value).split():
+                negated = word.startswith("-")
+                word = word.lstrip("-").strip('"')
+                if word and word.lower() != "or":
+                    clauses.append(f"{name} {'NOT ' if negated else ''}LIKE ?")
+                    params.append(f"%{word}%")
+            return " AND ".join(clauses) or "1", params
+        raise _error(f"unknown operator {op}", "PGRST100")
+
+    def _expression(self, text: str, joiner: str) -> tuple:
+        clauses, params = [], []
+        for term in _split(text):
+            negated = term.startswith("not.")
+            if negated:
+                term = term[4:]
+            if term.startswith(("and(", "or(")) and term.endswith(")"):
+                logic, _, inner = term[:-1].partition("(")
+                clause, values = self._expression(inner, logic.upper())
+            else:
+                column, _, rest = term.partition(".")
+                if rest.startswith("not."):
+                    negated = not negated
+                    rest = rest[4:]
+                op, _, value = rest.partition(".")
+                if op == "in":
+                    value = [_unquote(v) for v in _split(value.strip("()"))]
+                else:
+                    value = _unquote(value)
+                clause, values = self._condition(column, op, value)
+            clauses.append(f"NOT ({clause})" if negated else f"({clause})")
+            params.extend(values)
+        return f" {joiner} ".join(clauses) or "1", params
+
+    def eq(self, column: str, value):
+        return self._filter(*self._condition(column, "eq", value))
+
+    def neq(self, column: str, value):
+        return self._filter(*self._condition(column, "neq", value))
+
+    def gt(self, column: str, value):
+        return self._filter(*self._condition(column, "gt", value))
+
+    def gte(self, column: str, value):
+        return self._filter(*self._condition(column, "gte", value))
+
+    def lt(self, column: str, value):
+        return self._filter(*self._condition(column, "lt", value))
+
+    def lte(self, column: str, value):
+        return self._filter(*self._condition(column, "lte", value))
+
+    def like(self, column: str, pattern: str):
+        return self._filter(*self._condition(column, "like", pattern))
+
+    def ilike(self, column: str, pattern: str):
+        return self._filter(*self._condition(column, "ilike", pattern))
+
+    def is_(self, column: str, value):
+        return self._filter(*self._condition(column, "is", value))
+
+    def in_(self, column: str, values):
+        return self._filter(*self._condition(column, "in", values))
+
+    def text_search(self, column: str, query: str, options: dict = None):
+        return self._filter(*self._condition(column, "fts", query))
+
+    def or_(self, filters: str, reference_table: str = None):
+        return self._filter(*self._expression(filters, "OR"))
+
+    # 排序和范围
+
+    def order(
+        self, column: str, desc: bool = False, nullsfirst: bool = False, **kwargs
+    ):
+        name = self._db.column(self._table, column)
+        # 与 Postgres 一致：默认升序时 NULL 在最后，降序时在最前
+        nulls_first = nullsfirst or desc
+        direction = "DESC" if desc else "ASC"
+        self._order.append(f"({name} IS NULL) {'DESC' if nulls_first else 'ASC'}")
+        self._order.append(f"{name} {direction}")
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # 执行
+
+    def execute(self) -> FakeResponse:
+        self._client.wait()
+        try:
+            self._db.ensure(self._table)
+            with self._db.lock:
+                response = getattr(self, f"_{self._method}")()
+        except APIError:
+            self._client.record(error=True)
+            raise
+        except sqlite3.Error as e:
+            self._client.record(error=True)
+            raise _error(str(e), "23505" if "UNIQUE" in str(e) else "PGRST000")
+        self._client.record()
+        return response
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _rows(self, clause: str, params: list) -> list:
+        return [
+            dict(row)
+            for row in self._db.conn.execute(
+                f'SELECT * FROM "{self._table}"{clause}', params
+            )
+        ]
+
+    def _by_ids(self, ids: list) -> list:
+        if not ids:
+            return []
+        return self._rows(f" WHERE id IN ({_placeholders(ids)})", ids)
+
+    def _select(self) -> FakeResponse:
+        if self._columns.strip() == "*":
+            columns = "*"
+        else:
+            columns = ", ".join(
+                self._db.column(self._table, name.strip())
+                for name in self._columns.split(",")
+                if name.strip()
+            )
+        where = self._where_sql()
+        count = None
+        if self._count:
+            count = self._db.conn.execute(
+                f'SELECT COUNT(*) FROM "{self._table}"{where}', self._params
+            ).fetchone()[0]
+        sql = f'SELECT {columns} FROM "{self._table}"{where}'
+        if self._order:
+            sql += f" ORDER BY {', '.join(self._order)}"
+        if self._limit is not None or self._offset is not None:
+            sql += f" LIMIT {-1 if self._limit is None else int(self._limit)}"
+            sql += f" OFFSET {int(self._offset or 0)}"
+        data = [dict(row) for row in self._db.conn.execute(sql, self._params)]
+        return FakeResponse(data, count)
+
+    def _prepare(self, rows: list) -> list:
+        keys = []
+        for row in rows:
+            for key in row:
+                self._db.column(self._table, key)
+                if key not in keys:
+                    keys.append(key)
+        if self._default_to_null:
+            # 与 PostgREST 一致，批量写入时缺少的列写入 NULL
+            return [{key: row.get(key) for key in keys} for row in rows]
+        return [dict(row) for row in rows]
+
+    def _stamp(self, row: dict, created: bool) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        columns = self._db.columns[self._table]
+        if created and CREATED_COLUMN in columns and row.get(CREATED_COLUMN) is None:
+            row[CREATED_COLUMN] = now
+        if UPDATED_COLUMN in columns and UPDATED_COLUMN not in row:
+            row[UPDATED_COLUMN] = now
+        return row
+
+    def _insert(self) -> FakeResponse:
+        ids = []
+        with self._db.conn:
+            for row in self._prepare(self._payload):
+                row = self._stamp(row, created=True)
+                row = {k: v for k, v in row.items() if k != "id" or v is not None}
+                cursor = self._db.conn.execute(
+                    f'INSERT INTO "{self._table}" ({_quoted(row)}) '
+                    f"VALUES ({_placeholders(row)})",
+                    list(row.values()),
+                )
+                ids.append(cursor.lastrowid)
+        return FakeResponse(self._by_ids(ids))
+
+    def _upsert(self) -> FakeResponse:
+        key = self._on_conflict
+        target = self._db.column(self._table, key)
+        data = []
+        with self._db.conn:
+            for row in self._prepare(self._payload):
+                updates = self._stamp(dict(row), created=False)
+                row = self._stamp(dict(updates), created=True)
+                if row.get("id", 0) is None:
+                    del row["id"]
+                assignments = ", ".join(
+                    f'"{k}" = excluded."{k}"' for k in updates if k != key
+                )
+                cursor = self._db.conn.execute(
+                    f'INSERT INTO "{self._table}" ({_quoted(row)}) '
+                    f"VALUES ({_placeholders(row)}) ON CONFLICT ({target}) DO "
+                    + (f"UPDATE SET {assignments}" if assignments else "NOTHING"),
+                    list(row.values()),
+                )
+                if row.get(key) is None:
+                    # 没有给出冲突列时按新行插入
+                    data.extend(self._by_ids([cursor.lastrowid]))
+                else:
+                    data.extend(self._rows(f" WHERE {target} = ?", [row[key]]))
+        return FakeResponse(data)
+
+    def _matching_ids(self) -> list:
+        if not self._where:
+            # Supabase 拒绝不带过滤条件的更新和删除
+            raise _error("UPDATE and DELETE require a WHERE clause", "21000")
+        return [
+            row[0]
+            for row in self._db.conn.execute(
+                f'SELECT id FROM "{self._table}"{self._where_sql()}', self._params
+            )
+        ]
+
+    def _update(self) -> FakeResponse:
+        ids = self._matching_ids()
+        row = self._stamp(self._prepare(self._payload)[0], created=False)
+        if ids:
+            with self._db.conn:
+                assignments = ", ".join(f'"{k}" = ?' for k in row)
+                self._db.conn.execute(
+                    f'UPDATE "{self._table}" SET {assignments} '
+                    f"WHERE id IN ({_placeholders(ids)})",
+                    [*row.values(), *ids],
+                )
+        return FakeResponse(self._by_ids(ids))
+
+    def _delete(self) -> FakeResponse:
+        rows = self._by_ids(self._matching_ids())
+        if rows:
+            with self._db.conn:
+                self._db.conn.execute(
+                    f'DELETE FROM "{self._table}" WHERE id IN ({_placeholders(rows)})',
+                    [row["id"] for row in rows],
+                )
+        return FakeResponse(rows)
+
+
+class FakeClient:
+    """Stand-in for the Supabase client backed by a :class:`FakeDatabase`.
+
+    Every request waits for ``faults.delay()`` seconds and fails with an
+    ``APIError`` when ``faults.failed()`` says so. ``on_request(error)`` is
+    called once per request.
+    """
+
+    def __init__(self, db: FakeDatabase, faults, on_request=None):
+        self.db = db
+        self.faults = faults
+        self.on_request = on_request
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def wait(self):
+        time.sleep(self.faults.delay())
+        if self.faults.failed():
+            self.record(error=True)
+            raise _error("injected failure", "PGRST503")
+
+    def record(self, error: bool = False):
+        if self.on_request is not None:
+            self.on_request(error)
@@ -1,22 +1,234 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
 import streamlit as st
-from synology_api import filestation
-
-fl = filestation.FileStation(
-    ip_address=st.secrets["synology"]["host"],
-    port=st.secrets["synology"]["port"],
-    username=st.secrets["synology"]["username"],
-    password=st.secrets["synology"]["password"],
-    secure=True,
-    cert_verify=True,
-    dsm_version=7,
-    debug=True,
-    otp_code=None,
-)
-
-
-def upload_file(dest_path: str, file_path: str):
-    result = fl.upload_file(
-        dest_path=dest_path,
-        file_path=file_path,
+from synology_api import base_api, filestation
+
+from module.offline import offline_backend
+
+# 从上传缓冲区分块写入本地临时文件，避免整文件复制到内存
+CHUNK_SIZE = 1024 * 1024
+# 同时进行的上传数，限制临时文件占用的磁盘空间
+MAX_SPOOLS = 4
+
+# 空闲超过该时间的会话视为可能已过期，使用前重新登录
+SESSION_MAX_IDLE = 15 * 60
+# 会话过期或失效时 FileStation 返回的错误码
+SESSION_ERRORS = {105, 106, 107, 119}
+# FileStation 路径不存在的错误码
+FOLDER_NOT_FOUND = 408
+# 每次列目录请求返回的文件数
+LIST_BATCH = 1000
+
+_spool_slots = threading.BoundedSemaphore(MAX_SPOOLS)
+_login_lock = threading.Lock()
+# 空闲的已登录会话: [(FileStation, 上次使用时间)]
+_idle = []
+_idle_lock = threading.Lock()
+
+
+def _login() -> filestation.FileStation:
+    backend = offline_backend()
+    if backend is not None:
+        # 离线模式使用进程内的模拟 NAS
+        return backend.filestation(nas_folder)
+    with _login_lock:
+        # synology_api 默认在所有实例间共享一个登录会话，池中每个实例需要独立会话
+        base_api.BaseApi.shared_session = None
+        try:
+            return filestation.FileStation(
+                ip_address=st.secrets["synology"]["host"],
+                port=st.secrets["synology"]["port"],
+                username=st.secrets["synology"]["username"],
+                password=st.secrets["synology"]["password"],
+                secure=True,
+                cert_verify=True,
+                dsm_version=7,
+                debug=False,
+                otp_code=None,
+            )
+        finally:
+            base_api.BaseApi.shared_session = None
+
+
+def _logout(session: filestation.FileStation):
+    try:
+        session.logout()
+    except Exception:
+        pass
+
+
+def _acquire() -> filestation.FileStation:
+    now = time.monotonic()
+    expired = []
+    session = None
+    with _idle_lock:
+        while _idle:
+            candidate, used = _idle.pop()
+            if now - used < SESSION_MAX_IDLE:
+                session = candidate
+                break
+            expired.append(candidate)
+    for stale in expired:
+        _logout(stale)
+    # 首次使用时才登录
+    return session or _login()
+
+
+def _release(session: filestation.FileStation):
+    with _idle_lock:
+        if len(_idle) < MAX_SPOOLS:
+            _idle.append((session, time.monotonic()))
+            return
+    _logout(session)
+
+
+def _session_expired(result) -> bool:
+    # 上传失败时返回 (status_code, response)，其它接口抛出带 error_code 的异常
+    if isinstance(result, tuple) and len(result) == 2:
+        _, body = result
+        if isinstance(body, dict):
+            return body.get("error", {}).get("code") in SESSION_ERRORS
+    return getattr(result, "error_code", None) in SESSION_ERRORS
+
+
+def _call(request):
+    """Runs ``request(session)`` on a pooled FileStation session.
+
+    A session the NAS reports as expired is replaced by a fresh login and
+    the request is retried once; after any other error the session goes
+    back to the pool.
+    """
+    for attempt in range(2):
+        session = _acquire()
+        try:
+            result = request(session)
+        except Exception as e:
+            if not _session_expired(e):
+                # 路径不存在等其它错误不影响会话，放回池中复用
+                _release(session)
+                raise
+            _logout(session)
+            if attempt == 0:
+                continue
+            raise
+        if _session_expired(result):
+            _logout(session)
+            continue
+        _release(session)
+        return result
+    return result
+
+
+def nas_folder(table: str) -> str:
+    """Returns the NAS folder that holds the files of ``table``."""
+    root = st.secrets.get("synology", {}).get("folder", "/knowledge_base")
+    return f"{root.rstrip('/')}/{table}"
+
+
+def upload_file(dest_path: str, file_path: str) -> bool:
+    """Uploads a local file; True once FileStation confirms it."""
+    result = _call(
+        # synology_api 使用 MultipartEncoder 从磁盘流式发送，
+        # 不会先把整个请求体读入内存
+        lambda session: session.upload_file(
+            dest_path=dest_path,
+            file_path=file_path,
+            create_parents=True,
+            overwrite=True,
+            verify=True,
+            progress_bar=False,
+        )
     )
-    return result["success"]
+    # 失败时返回 (status_code, response) 而不是响应字典
+    return isinstance(result, dict) and bool(result.get("success"))
+
+
+def list_files(folder: str):
+    """Yields ``(name, size)`` of the files in ``folder``, ``LIST_BATCH`` per request.
+
+    A folder that does not exist yet yields nothing.
+    """
+    offset = 0
+    while True:
+        try:
+            response = _call(
+                lambda session: session.get_file_list(
+                    folder_path=folder,
+                    offset=offset,
+                    limit=LIST_BATCH,
+                    sort_by="name",
+                    filetype="file",
+                    additional=["size"],
+                )
+            )
+        except Exception as e:
+            if getattr(e, "error_code", None) == FOLDER_NOT_FOUND:
+                return
+            raise
+        data = response.get("data", {})
+        files = data.get("files", [])
+        for entry in files:
+            yield entry["name"], entry.get("additional", {}).get("size")
+        offset += len(files)
+        if not files or offset >= data.get("total", 0):
+            return
+
+
+class UploadResult(NamedTuple):
+    """Outcome of :func:`upload_stream`."""
+
+    ok: bool
+    # 文件内容的 SHA-256 十六进制摘要和字节数
+    checksum: str
+    size: int
+    # 内容与已存储的校验和相同，未重新传输
+    skipped: bool = False
+
+
+def upload_stream(
+    stream,
+    file_name: str,
+    dest_path: str,
+    size: int = None,
+    progress=None,
+    known_checksum: str = None,
+) -> UploadResult:
+    """Uploads a readable binary stream to ``dest_path/file_name`` on the NAS.
+
+    The stream is copied in ``CHUNK_SIZE`` chunks into a temporary file that
+    is removed afterwards, and hashed with SHA-256 on the way; at most
+    ``MAX_SPOOLS`` uploads are spooled at once. When the digest equals
+    ``known_checksum`` the transfer is skipped. ``progress(fraction, text)``
+    is called as the upload advances. ``ok`` is True only once FileStation
+    has confirmed the upload (or it was skipped).
+    """
+    report = progress or (lambda fraction, text: None)
+    with _spool_slots:
+        directory = tempfile.mkdtemp(prefix="nas-upload-")
+        try:
+            path = os.path.join(directory, os.path.basename(file_name))
+            digest = hashlib.sha256()
+            written = 0
+            with open(path, "wb") as spool:
+                while chunk := stream.read(CHUNK_SIZE):
+                    spool.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+                    if size:
+                        report(0.5 * written / size, f"Preparing {file_name}")
+            checksum = digest.hexdigest()
+            if checksum == known_checksum:
+                report(1.0, f"{file_name} is unchanged")
+                return UploadResult(True, checksum, written, skipped=True)
+            report(0.5, f"Uploading {file_name} to the NAS")
+            ok = upload_file(dest_path, path)
+            report(1.0, f"Uploaded {file_name}" if ok else f"Failed {file_name}")
+            return UploadResult(ok, checksum, written)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from typing import NamedTuple
+
+import streamlit as st
+
+OPERATORS = ("eq", "in", "gte", "lt", "ilike", "fts")
+
+
+class Filter(NamedTuple):
+    """One predicate pushed down into the table query.
+
+    ``op`` is one of ``OPERATORS``; ``in`` takes a tuple of values, ``ilike``
+    matches a substring and ``fts`` runs a web-style full-text search.
+    """
+
+    column: str
+    op: str
+    value: object
+
+
+def apply_filters(query, filters: tuple):
+    """Adds ``filters`` to a PostgREST query builder."""
+    for column, op, value in filters:
+        if op == "eq":
+            query = query.eq(column, value)
+        elif op == "in":
+            query = query.in_(column, list(value))
+        elif op == "gte":
+            query = query.gte(column, value)
+        elif op == "lt":
+            query = query.lt(column, value)
+        elif op == "ilike":
+            query = query.ilike(column, f"%{value}%")
+        elif op == "fts":
+            query = query.text_search(column, value, options={"type": "websearch"})
+        else:
+            raise ValueError(f"Unknown filter operator: {op}")
+    return query
+
+
+def filters_sql(filters: tuple, quote) -> tuple:
+    """Translates ``filters`` into a SQLite ``WHERE`` clause and parameters.
+
+    Full-text search falls back to a substring match locally.
+    """
+    clauses, params = [], []
+    for column, op, value in filters:
+        name = quote(column)
+        if op == "eq":
+            clauses.append(f"{name} = ?")
+            params.append(value)
+        elif op == "in":
+            clauses.append(f"{name} IN ({', '.join('?' for _ in value)})")
+            params.extend(value)
+        elif op == "gte":
+            clauses.append(f"{name} >= ?")
+            params.append(value)
+        elif op == "lt":
+            clauses.append(f"{name} < ?")
+            params.append(value)
+        elif op in ("ilike", "fts"):
+            clauses.append(f"{name} LIKE ?")
+            params.append(f"%{value}%")
+        else:
+            raise ValueError(f"Unknown filter operator: {op}")
+    if not clauses:
+        return "", []
+    return "WHERE " + " AND ".join(clauses), params
+
+
+def filter_panel(columns: list, text_columns: list, date_columns: list) -> tuple:
+    """Renders the filter builder and returns the selected filters."""
+    filters = []
+    with st.expander("Filter", expanded=False):
+        search_column = st.selectbox("Search In", options=list(text_columns))
+        search = st.text_input("Search", key="filter_search").strip()
+        full_text = st.toggle("Full-text search", key="filter_full_text")
+        if search and search_column:
+            op = "fts" if full_text else "ilike"
+            filters.append(Filter(search_column, op, search))
+
+        date_column = st.selectbox("Date", options=["None", *date_columns])
+        if date_column != "None":
+            date_range = st.date_input("Date Range", value=(), key="filter_dates")
+            if len(date_range) == 2:
+                start, end = date_range
+                filters.append(Filter(date_column, "gte", start.isoformat()))
+                filters.append(
+                    Filter(date_column, "lt", (end + timedelta(days=1)).isoformat())
+                )
+
+        value_column = st.selectbox("Equals", options=["None", *columns])
+        if value_column != "None":
+            raw = st.text_input(
+                "Values",
+                key="filter_values",
+                help="Separate multiple values with commas",
+            )
+            values = tuple(v.strip() for v in raw.split(",") if v.strip())
+            if len(values) == 1:
+                filters.append(Filter(value_column, "eq", values[0]))
+            elif values:
+                filters.append(Filter(value_column, "in", values))
+    return tuple(filters)
@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+import pandas as pd
+
+
+@dataclass
+class ChangeSet:
+    """Rows inserted, deleted and modified between two versions of a table page.
+
+    ``modified`` holds the edited rows indexed by id and ``changed`` is a
+    boolean frame of the same shape marking which fields differ.
+    """
+
+    inserted: pd.DataFrame = field(default_factory=pd.DataFrame)
+    deleted: list = field(default_factory=list)
+    modified: pd.DataFrame = field(default_factory=pd.DataFrame)
+    changed: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    def is_empty(self) -> bool:
+        return self.inserted.empty and not self.deleted and self.modified.empty
+
+    def insert_records(self) -> list:
+        return [
+            {column: json_value(value) for column, value in row.items()}
+            for row in self.inserted.to_dict("records")
+        ]
+
+    def update_records(self, key: str = "id") -> list:
+        """Returns one dict per modified row with the id and changed fields only."""
+        records = []
+        values = self.modified.to_dict("index")
+        masks = self.changed.to_dict("index")
+        for row_id, row in values.items():
+            record = {key: row_id}
+            for column, changed in masks[row_id].items():
+                if changed:
+                    record[column] = json_value(row[column])
+            records.append(record)
+        return records
+
+
+def json_value(value):
+    """Converts pandas/numpy scalars to values PostgREST accepts as JSON."""
+    # None、NaN、NaT 以及 Arrow 列中的 pd.NA 都写为 null
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _key_strings(keys: pd.Series) -> pd.Series:
+    # 新增行会让整数 id 列变成 float，先转回整数，避免 "1.0" 与 "1" 不匹配
+    if pd.api.types.is_float_dtype(keys):
+        keys = keys.astype("Int64")
+    return keys.astype(str)
+
+
+def editor_ids(dataset: pd.DataFrame, key: str = "id") -> list:
+    """Returns the row ids of ``dataset`` in the order the editor shows them."""
+    return _key_strings(dataset[key]).tolist()
+
+
+def diff_editor_state(
+    state: dict,
+    ids: list,
+    columns,
+    key: str = "id",
+    ignore: tuple = (),
+) -> ChangeSet:
+    """Builds a :class:`ChangeSet` from ``st.data_editor``'s delta state.
+
+    ``state`` is the value stored under the editor's widget key, with
+    ``edited_rows`` and ``deleted_rows`` addressed by row position. ``ids``
+    are the :func:`editor_ids` of the page the editor showed, saved when it
+    was drawn, so positions resolve to the rows the user actually edited
+    even if the page has changed since. Only edited fields are
+    materialised, so no copy of the page is needed to detect changes.
+    """
+    columns = [c for c in columns if c != key and c not in ignore]
+    deleted_rows = {
+        int(position)
+        for position in state.get("deleted_rows", [])
+        if int(position) < len(ids)
+    }
+    edited_rows = {
+        int(position): values
+        for position, values in state.get("edited_rows", {}).items()
+        if int(position) < len(ids) and int(position) not in deleted_rows
+    }
+
+    positions = sorted(edited_rows)
+    index = pd.Index([ids[p] for p in positions])
+    modified = pd.DataFrame(None, index=index, columns=columns, dtype=object)
+    changed = pd.DataFrame(False, index=index, columns=columns)
+    for row_id, position in zip(index, positions):
+        for column, value in edited_rows[position].items():
+            if column in changed.columns:
+                modified.at[row_id, column] = value
+                changed.at[row_id, column] = True
+    rows_changed = changed.any(axis=1)
+
+    inserted = pd.DataFrame(state.get("added_rows", []))
+    inserted = inserted.reindex(
+        columns=[c for c in columns if c in inserted.columns]
+    ).dropna(how="all")
+
+    return ChangeSet(
+        inserted=inserted,
+        deleted=[ids[p] for p in sorted(deleted_rows)],
+        modified=modified[rows_changed],
+        changed=changed[rows_changed],
+    )
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from supabase import Client
+
+from module.agent_cache import normalize_query
+from module.bulk_write import update_rows
+from module.esg_agent import CONCURRENCY, RATE_PER_MINUTE, Query, report_url, run_batch
+from module.versions import bump_table_version
+
+# 累计多少条结果或多少秒后写入 esg_meta
+FLUSH_SIZE = 50
+FLUSH_INTERVAL = 30
+BATCH_SIZE = 1000
+
+STATUSES = ("pending", "done", "failed")
+
+logger = logging.getLogger(__name__)
+
+
+def _key(query: Query) -> str:
+    # 有记录 ID 时按记录去重，否则按规范化的查询文本
+    if query.record_id is not None:
+        return f"id:{query.record_id}"
+    return f"q:{normalize_query(query.text)}"
+
+
+class HarvestCheckpoint:
+    """SQLite checkpoint of a harvest: every query with its status and result.
+
+    A query stays ``pending`` until its result is recorded, so queries in
+    flight when the process dies run again on resume. ``written`` marks
+    results already flushed to esg_meta.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS queries (key TEXT PRIMARY KEY, "
+                "company TEXT, year INTEGER, record_id, "
+                "status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, "
+                "report_url TEXT, output TEXT, error TEXT, "
+                "written INTEGER DEFAULT 0, updated REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS queries_status ON queries (status)"
+            )
+
+    def add(self, queries) -> int:
+        """Adds queries not seen before; returns how many were new."""
+        added = 0
+        batch = []
+        for query in queries:
+            batch.append(
+                (_key(query), query.company, query.year, query.record_id, time.time())
+            )
+            if len(batch) >= BATCH_SIZE:
+                added += self._insert(batch)
+                batch = []
+        return added + self._insert(batch)
+
+    def _insert(self, rows: list) -> int:
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO queries "
+                "(key, company, year, record_id, updated) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def retry_failed(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE queries SET status = 'pending' WHERE status = 'failed'"
+            ).rowcount
+
+    def pending(self):
+        """Yields pending queries in batches read by rowid."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, company, year, record_id FROM queries "
+                    "WHERE status = 'pending' AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, BATCH_SIZE),
+                ).fetchall()
+            for rowid, company, year, record_id in rows:
+                yield Query(company, year, record_id)
+                last = rowid
+            if len(rows) < BATCH_SIZE:
+                return
+
+    def record(self, result):
+        """Stores one result; failed queries keep their error message."""
+        query = result.query
+        url = report_url(result.output) if result.error is None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE queries SET status = ?, attempts = attempts + ?, "
+                "report_url = ?, output = ?, error = ?, written = ?, updated = ? "
+                "WHERE key = ?",
+                (
+                    "done" if result.error is None else "failed",
+                    result.attempts,
+                    url,
+                    json.dumps(result.output, ensure_ascii=False, default=str)
+                    if result.output is not None
+                    else None,
+                    result.error,
+                    # 没有找到 URL 或不对应已有记录的结果无需写入
+                    0 if url and query.record_id is not None else 1,
+                    time.time(),
+                    _key(query),
+                ),
+            )
+
+    def unwritten(self) -> list:
+        """Returns ``(key, record_id, report_url)`` not yet in esg_meta."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, record_id, report_url FROM queries "
+                "WHERE status = 'done' AND written = 0 AND record_id IS NOT NULL"
+            ).fetchall()
+
+    def mark_written(self, keys: list):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE queries SET written = 1 WHERE key = ?", [(k,) for k in keys]
+            )
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), SUM(written), "
+                "SUM(record_id IS NULL AND report_url IS NOT NULL) "
+                "FROM queries GROUP BY status"
+            ).fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count, _, _ in rows:
+            counts[status] = count
+        done = [row for row in rows if row[0] == "done"]
+        # 已完成且已写入 esg_meta（或无需写入）的查询数
+        counts["written"] = sum(row[2] or 0 for row in done)
+        # 找到了报告但没有对应记录的查询，结果只保存在检查点中
+        counts["unmatched"] = sum(row[3] or 0 for row in done)
+        return counts
+
+
+def flush(client: Client, checkpoint: HarvestCheckpoint) -> int:
+    """Writes recorded report URLs to esg_meta; returns the rows written.
+
+    Only queries for an existing record are written, as updates that skip
+    records deleted in the meantime; no partial rows are inserted for
+    unmatched companies. Rows are marked written only after the request
+    succeeds.
+    """
+    rows = checkpoint.unwritten()
+    if not rows:
+        return 0
+    _, missing = update_rows(
+        client,
+        "esg_meta",
+        [{"id": record_id, "report_url": url} for _, record_id, url in rows],
+    )
+    if missing:
+        # 记录在检索期间被删除，不重新创建
+        logger.warning("esg_meta records deleted meanwhile: %s", missing)
+    checkpoint.mark_written([key for key, _, _ in rows])
+    bump_table_version("esg_meta")
+    return len(rows)
+
+
+async def run_harvest(
+    client: Client,
+    checkpoint: HarvestCheckpoint,
+    concurrency: int = CONCURRENCY,
+    rate_per_minute: float = RATE_PER_MINUTE,
+    cache=None,
+    on_result=None,
+    write: bool = True,
+) -> dict:
+    """Runs the checkpoint's pending queries and flushes results as they arrive.
+
+    Each result is committed to the checkpoint before ``on_result`` is
+    called; report URLs are written to esg_meta every ``FLUSH_SIZE``
+    results or ``FLUSH_INTERVAL`` seconds, and left unwritten (to be
+    retried on resume) when a flush fails. Returns the final counts.
+    """
+    state = {"since_flush": 0, "flushed_at": time.monotonic()}
+
+    def do_flush():
+        state["since_flush"] = 0
+        state["flushed_at"] = time.monotonic()
+        try:
+            flush(client, checkpoint)
+        except Exception as e:
+            logger.warning("writing results to esg_meta failed, will retry: %s", e)
+
+    if write:
+        # 上次运行中断前未写入的结果
+        await asyncio.to_thread(do_flush)
+
+    async def flush_when_due():
+        while True:
+            await asyncio.sleep(1)
+            due = time.monotonic() - state["flushed_at"] >= FLUSH_INTERVAL
+            if state["since_flush"] >= FLUSH_SIZE or (due and state["since_flush"]):
+                await asyncio.to_thread(do_flush)
+
+    def recorded(result):
+        checkpoint.record(result)
+        state["since_flush"] += 1
+        if on_result is not None:
+            on_result(result)
+
+    flusher = asyncio.create_task(flush_when_due()) if write else None
+    try:
+        await run_batch(
+            checkpoint.pending(),
+            concurrency=concurrency,
+            rate_per_minute=rate_per_minute,
+            on_result=recorded,
+            cache=cache,
+        )
+    finally:
+        if flusher is not None:
+            flusher.cancel()
+    if write:
+        await asyncio.to_thread(do_flush)
+    return checkpoint.counts()
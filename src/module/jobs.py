@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 4
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 5
+# 保留的已结束任务数
+_MAX_JOBS = 500
+
+STATUSES = ("queued", "running", "done", "failed")
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+_lock = threading.Lock()
+# job id -> Job
+_jobs: OrderedDict = OrderedDict()
+
+
+@dataclass
+class Job:
+    """One background operation and its progress."""
+
+    id: str
+    owner: str
+    label: str
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = ""
+    attempts: int = 0
+    created: float = field(default_factory=time.time)
+    finished: float = None
+    # 任务函数的返回值，例如批量上传的结果表
+    result: object = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+def _update(job: Job, **changes):
+    with _lock:
+        for name, value in changes.items():
+            setattr(job, name, value)
+
+
+def _run(job: Job, fn):
+    def report(fraction: float, message: str = None):
+        _update(job, progress=min(max(fraction, 0.0), 1.0))
+        if message is not None:
+            _update(job, message=message)
+
+    while True:
+        _update(job, status="running", attempts=job.attempts + 1)
+        try:
+            result = fn(report)
+        except Exception as e:
+            logger.warning("job %s (%s) failed: %s", job.id, job.label, e)
+            if job.attempts < MAX_ATTEMPTS:
+                # 自动重试，无需用户操作
+                _update(job, status="queued", message=f"Retrying after error: {e}")
+                time.sleep(RETRY_DELAY * job.attempts)
+                continue
+            _update(job, status="failed", message=str(e), finished=time.time())
+            return
+        _update(job, status="done", progress=1.0, result=result, finished=time.time())
+        return
+
+
+def submit(owner: str, label: str, fn) -> Job:
+    """Queues ``fn(report)`` on the shared worker pool.
+
+    ``report(fraction, message=None)`` updates the job's progress. A job that
+    raises is retried up to ``MAX_ATTEMPTS`` times with a growing delay, so
+    ``fn`` must be safe to run again. ``owner`` identifies the session the
+    job is listed for.
+    """
+    job = Job(id=uuid.uuid4().hex, owner=owner, label=label)
+    with _lock:
+        _jobs[job.id] = job
+        finished = [j.id for j in _jobs.values() if not j.active]
+        for job_id in finished[: max(0, len(_jobs) - _MAX_JOBS)]:
+            del _jobs[job_id]
+    _executor.submit(_run, job, fn)
+    return job
+
+
+def jobs_for(owner: str) -> list:
+    """Returns copies of the jobs of ``owner``, newest first."""
+    with _lock:
+        return [
+            Job(**vars(job)) for job in reversed(_jobs.values()) if job.owner == owner
+        ]
+
+
+def session_owner() -> str:
+    """Returns the job owner id of the current Streamlit session."""
+    if "job_owner" not in st.session_state:
+        st.session_state.job_owner = uuid.uuid4().hex
+    return st.session_state.job_owner
@@ -0,0 +1,314 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+from supabase import Client
+
+from module.filters import filters_sql
+from module.pagination import quote_value
+from module.schema import column_names
+
+SYNC_INTERVAL = 60
+RECONCILE_INTERVAL = 6 * 3600
+BATCH_SIZE = 1000
+
+# 各表增量同步使用的时间列
+WATERMARK_COLUMNS = {
+    "esg_meta": ("last_updated_time", "created_time"),
+    "reports": ("uploaded_time",),
+    "standards": ("last_updated_time",),
+    "internal_use": ("created_time", "uploaded_time"),
+}
+# reports 没有修改时间列，编辑和无文件的新记录只能通过定期全量同步获取（秒）
+FULL_SYNC_INTERVALS = {"reports": 30 * 60}
+
+_lock = threading.Lock()
+_mirrors = {}
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _newer(value, than) -> bool:
+    if than is None:
+        return True
+    return datetime.fromisoformat(value) > datetime.fromisoformat(than)
+
+
+class TableMirror:
+    """Local SQLite copy of one Supabase table.
+
+    The mirror is filled by incremental pulls of rows whose watermark columns
+    (``last_updated_time``, ``created_time``, ...) are at or after the newest
+    value seen so far. Deleted rows are detected by a periodic id
+    reconciliation. Writes still go to Supabase; callers pass the returned
+    rows to :meth:`apply` so the mirror reflects them immediately.
+    ``generation`` changes only when the local data actually changes, not
+    when rows are pulled again unchanged, and can be used as a cache key.
+    Tables whose watermark columns do not change on every edit set
+    ``full_sync_interval`` to pull all rows again that often.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        columns,
+        watermark_columns,
+        full_sync_interval: float = None,
+    ):
+        self.table = table
+        self.columns = ["id"] + [c for c in columns if c != "id"]
+        self.watermark_columns = tuple(watermark_columns)
+        self.full_sync_interval = full_sync_interval
+        self.last_sync = 0.0
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            info = list(self._conn.execute("PRAGMA table_info(rows)"))
+            existing = [row["name"] for row in info]
+            # 旧版本以 TEXT 存储 id，按字符串排序，与 Postgres 不一致
+            text_ids = any(
+                row["name"] == "id" and row["type"] != "NUMERIC" for row in info
+            )
+            if existing and (existing != self.columns or text_ids):
+                # 列发生变化时丢弃旧镜像，重新全量同步
+                self._conn.execute("DROP TABLE rows")
+                self._conn.execute("DROP TABLE IF EXISTS meta")
+            columns = ", ".join(_ident(c) for c in self.columns[1:])
+            self._conn.execute(
+                # NUMERIC 使整数 id 按数值存储和排序，uuid 仍为文本
+                f"CREATE TABLE IF NOT EXISTS rows (id NUMERIC PRIMARY KEY, {columns})"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)"
+            )
+
+    def _meta(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else row["value"]
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @property
+    def generation(self) -> int:
+        """Stored with the data, so writes from other processes change it too."""
+        return self._meta("generation") or 0
+
+    def _bump(self):
+        self._set_meta("generation", self.generation + 1)
+
+    @property
+    def ready(self) -> bool:
+        """True once the first full pull has completed."""
+        return self._meta("synced_at") is not None
+
+    def _upsert(self, rows: list) -> int:
+        """Stores ``rows``; returns how many were new or differed from the copy."""
+        columns = ", ".join(_ident(c) for c in self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        updates = ", ".join(
+            f"{_ident(c)} = excluded.{_ident(c)}" for c in self.columns[1:]
+        )
+        differs = " OR ".join(
+            f"rows.{_ident(c)} IS NOT excluded.{_ident(c)}" for c in self.columns[1:]
+        )
+        before = self._conn.total_changes
+        # 内容未变的行不计入修改，按水印重复拉取的行不会使缓存失效
+        self._conn.executemany(
+            f"INSERT INTO rows ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates} WHERE {differs}",
+            [tuple(row.get(c) for c in self.columns) for row in rows],
+        )
+        return self._conn.total_changes - before
+
+    def apply(self, rows: list = (), deleted_ids: list = ()):
+        """Reflects rows written to or deleted from Supabase in the mirror."""
+        with self._lock, self._conn:
+            changed = self._upsert(rows) if rows else 0
+            if deleted_ids:
+                changed += self._conn.executemany(
+                    "DELETE FROM rows WHERE id = ?", [(str(i),) for i in deleted_ids]
+                ).rowcount
+            if changed:
+                self._bump()
+
+    def sync(self, client: Client):
+        """Pulls rows changed since the last watermark; no-op if already running."""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            watermark = self._meta("watermark")
+            full_synced = self._meta("full_synced_at")
+            if self.full_sync_interval and (
+                full_synced is None
+                or time.time() - full_synced > self.full_sync_interval
+            ):
+                # 水印列不记录所有修改时，定期从头拉取全部记录
+                watermark = None
+            full = watermark is None
+            newest = watermark
+            last_id = None
+            changed = 0
+            while True:
+                query = (
+                    client.table(self.table)
+                    .select(", ".join(self.columns))
+                    .order("id")
+                    .limit(BATCH_SIZE)
+                )
+                if watermark is not None:
+                    query = query.or_(
+                        ",".join(
+                            f"{c}.gte.{quote_value(watermark)}"
+                            for c in self.watermark_columns
+                        )
+                    )
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                rows = query.execute().data
+                if not rows:
+                    break
+                with self._lock, self._conn:
+                    changed += self._upsert(rows)
+                for row in rows:
+                    for column in self.watermark_columns:
+                        value = row.get(column)
+                        if value and _newer(value, newest):
+                            newest = value
+                last_id = rows[-1]["id"]
+                if len(rows) < BATCH_SIZE:
+                    break
+
+            reconciled = self._meta("reconciled_at")
+            if reconciled is None or time.time() - reconciled > RECONCILE_INTERVAL:
+                self._reconcile_deletes(client)
+
+            with self._lock, self._conn:
+                if newest is not None:
+                    self._set_meta("watermark", newest)
+                first = self._meta("synced_at") is None
+                self._set_meta("synced_at", time.time())
+                if full:
+                    self._set_meta("full_synced_at", time.time())
+                if changed or first:
+                    self._bump()
+            self.last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def _reconcile_deletes(self, client: Client):
+        """Removes local rows whose ids no longer exist in Supabase."""
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id NUMERIC)")
+            self._conn.execute("DELETE FROM seen")
+        last_id = None
+        while True:
+            query = client.table(self.table).select("id").order("id").limit(BATCH_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data
+            if not rows:
+                break
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO seen (id) VALUES (?)", [(str(r["id"]),) for r in rows]
+                )
+            last_id = rows[-1]["id"]
+            if len(rows) < BATCH_SIZE:
+                break
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM rows WHERE id NOT IN (SELECT id FROM seen)"
+            ).rowcount
+            self._conn.execute("DELETE FROM seen")
+            self._set_meta("reconciled_at", time.time())
+            if deleted:
+                self._bump()
+
+    def refresh_in_background(self, client: Client):
+        """Starts a sync on a worker thread when the last one is stale."""
+        if time.monotonic() - self.last_sync < SYNC_INTERVAL:
+            return
+        if self._sync_lock.locked():
+            return
+        threading.Thread(
+            target=self.sync, args=(client,), name=f"mirror-{self.table}", daemon=True
+        ).start()
+
+    def count(self, filters: tuple = ()) -> int:
+        where, params = filters_sql(filters, _ident)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM rows {where}", params
+            ).fetchone()[0]
+
+    def page(
+        self,
+        sort_field: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        filters: tuple = (),
+    ) -> list:
+        """Returns rows ordered like Postgres (NULLs largest), ``id`` as tie-breaker."""
+        if sort_field not in self.columns:
+            raise ValueError(f"Unknown sort column: {sort_field}")
+        direction = "DESC" if descending else "ASC"
+        columns = ", ".join(_ident(c) for c in self.columns)
+        sort = _ident(sort_field)
+        where, params = filters_sql(filters, _ident)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM rows {where} "
+                f"ORDER BY {sort} IS NULL {direction}, {sort} {direction}, "
+                f"id {direction} LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def mirror_enabled() -> bool:
+    return bool(st.secrets.get("mirror", {}).get("enabled", False))
+
+
+def get_mirror(table: str) -> TableMirror:
+    """Returns the process-wide mirror of ``table``, opening it on first use."""
+    with _lock:
+        if table not in _mirrors:
+            directory = st.secrets.get("mirror", {}).get("path", ".mirror")
+            os.makedirs(directory, exist_ok=True)
+            _mirrors[table] = TableMirror(
+                os.path.join(directory, f"{table}.sqlite3"),
+                table,
+                column_names(table),
+                WATERMARK_COLUMNS[table],
+                FULL_SYNC_INTERVALS.get(table),
+            )
+        return _mirrors[table]
+
+
+def apply_to_mirror(table: str, rows: list = (), deleted_ids: list = ()):
+    """Reflects a write to ``table`` in its mirror when mirroring is enabled.
+
+    Every code path that writes to a mirrored table calls this with the rows
+    Supabase returned, so pages served from the mirror show the write at once.
+    """
+    if table in WATERMARK_COLUMNS and mirror_enabled():
+        get_mirror(table).apply(rows, deleted_ids)
@@ -0,0 +1,119 @@
+import random
+import threading
+
+import streamlit as st
+
+from module.fake_agent import FakeRemoteGraph
+from module.fake_nas import FakeNas
+from module.fake_postgrest import FakeClient, FakeDatabase
+
+ROWS = 100_000
+# 各模拟服务的默认延迟（毫秒），可在 secrets 的 [offline.<服务>] 中配置
+LATENCY_MS = {"supabase": 20, "langgraph": 3000, "synology": 50}
+
+
+class Faults:
+    """Latency and failures injected into one fake service.
+
+    Each request waits ``latency_ms`` ± ``jitter_ms`` and fails with
+    probability ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        seed=None,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency + jitter)
+
+    def failed(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+def offline_settings() -> dict:
+    return st.secrets.get("offline", {})
+
+
+def offline_enabled() -> bool:
+    return bool(offline_settings().get("enabled", False))
+
+
+class OfflineBackend:
+    """Fake Supabase, agent graph and NAS sharing one generated dataset."""
+
+    def __init__(self, settings: dict):
+        self.seed = int(settings.get("seed", 0))
+        self.db = FakeDatabase(int(settings.get("rows", ROWS)), self.seed)
+        self.faults = {}
+        for service, latency in LATENCY_MS.items():
+            options = settings.get(service, {})
+            self.faults[service] = Faults(
+                float(options.get("latency_ms", latency)),
+                float(options.get("jitter_ms", 0)),
+                float(options.get("error_rate", 0.0)),
+                seed=f"{self.seed}:{service}",
+            )
+        agent = settings.get("langgraph", {})
+        self.hit_rate = float(agent.get("hit_rate", 0.9))
+        nas = settings.get("synology", {})
+        self.nas = FakeNas(
+            self.faults["synology"],
+            session_error_rate=float(nas.get("session_error_rate", 0.0)),
+            bandwidth=float(nas.get("bandwidth_mb_s", 0)) * 2**20,
+        )
+        self._nas_lock = threading.Lock()
+
+    def client(self, on_request=None) -> FakeClient:
+        return FakeClient(self.db, self.faults["supabase"], on_request)
+
+    def remote_graph(self, graph_name: str) -> FakeRemoteGraph:
+        return FakeRemoteGraph(
+            graph_name, self.faults["langgraph"], self.seed, self.hit_rate
+        )
+
+    def filestation(self, folder_of):
+        """Returns a NAS session; ``folder_of(table)`` places the seeded files.
+
+        The first session stores a file for every uploaded record, so the
+        NAS starts out consistent with the database apart from the problems
+        :meth:`FakeNas.seed` adds on purpose.
+        """
+        with self._nas_lock:
+            if not self.nas.seeded:
+                self.nas.seed(
+                    {
+                        folder_of(table): self.db.uploaded_files(table)
+                        for table in self.db.columns
+                    },
+                    self.seed,
+                )
+        return self.nas.session()
+
+
+@st.cache_resource(show_spinner=False)
+def _backend() -> OfflineBackend:
+    return OfflineBackend(offline_settings())
+
+
+def offline_backend() -> OfflineBackend:
+    """Returns the process-wide fake backend, or None unless offline mode is on.
+
+    Offline mode is enabled with ``enabled = true`` in the ``[offline]``
+    secrets section; the app then needs no Supabase, LangGraph or NAS
+    credentials.
+    """
+    if not offline_enabled():
+        return None
+    return _backend()
@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# 每个块的行数，是页大小选项 25、50、100 的公倍数
+BLOCK_SIZE = 100
+MAX_ENTRIES = 512
+MAX_BYTES = 256 * 1024 * 1024
+
+
+class PageCache:
+    """LRU cache of DataFrame blocks bounded by entry count and total bytes.
+
+    Cached frames are shared by all sessions and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (frame, size in bytes)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, frame: pd.DataFrame):
+        size = int(frame.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (frame, size)
+            self._bytes += size
+            while (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+page_cache = PageCache()
+
+
+def _align_categories(frames: list) -> list:
+    """Gives categorical columns the same categories so concat keeps the dtype."""
+    columns = [
+        c
+        for c, dtype in frames[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    if not columns:
+        return frames
+    dtypes = {
+        c: pd.CategoricalDtype(
+            list(dict.fromkeys(v for f in frames for v in f[c].cat.categories))
+        )
+        for c in columns
+    }
+    return [frame.astype(dtypes) for frame in frames]
+
+
+def read_rows(key: tuple, start: int, count: int, load_block) -> pd.DataFrame:
+    """Returns rows ``start .. start + count`` assembled from cached blocks.
+
+    Rows are fetched and cached in blocks of ``BLOCK_SIZE`` per ``key``
+    (table, sort order, filters and data version), so changing the page size
+    or moving to an overlapping range only loads blocks not cached yet.
+    ``load_block(block_number, BLOCK_SIZE)`` returns the block's DataFrame;
+    its exceptions are not cached.
+    """
+    first = start // BLOCK_SIZE
+    last = (start + count - 1) // BLOCK_SIZE
+    frames = []
+    for block in range(first, last + 1):
+        block_key = key + (block,)
+        frame = page_cache.get(block_key)
+        if frame is None:
+            frame = load_block(block, BLOCK_SIZE)
+            page_cache.put(block_key, frame)
+        frames.append(frame)
+        if len(frame) < BLOCK_SIZE:
+            # 已到表尾，后面的块为空
+            break
+    if len(frames) == 1:
+        rows = frames[0]
+    else:
+        rows = pd.concat(_align_categories(frames), ignore_index=True)
+    offset = start - first * BLOCK_SIZE
+    return rows.iloc[offset : offset + count].reset_index(drop=True)
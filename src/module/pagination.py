@@ -0,0 +1,185 @@
+import threading
+from collections import OrderedDict
+
+from supabase import Client
+
+from module.filters import apply_filters
+
+# 距离最近锚点不超过该行数时，直接从锚点向后偏移，否则先定位边界键
+MAX_SKIP = 1000
+
+_MAX_CONTEXTS = 64
+_MAX_ANCHORS = 5000
+
+_lock = threading.Lock()
+# (table, sort_field, descending, filters, version) -> {row position: (sort value, id)}
+_anchors: OrderedDict = OrderedDict()
+
+
+def _known_anchors(context: tuple) -> dict:
+    """Returns a snapshot of the anchors recorded for ``context``."""
+    with _lock:
+        anchors = _anchors.get(context)
+        if anchors is None:
+            return {}
+        _anchors.move_to_end(context)
+        return dict(anchors)
+
+
+def _remember(context: tuple, position: int, key: tuple):
+    with _lock:
+        anchors = _anchors.get(context)
+        if anchors is None:
+            anchors = _anchors[context] = {}
+            while len(_anchors) > _MAX_CONTEXTS:
+                _anchors.popitem(last=False)
+        if len(anchors) >= _MAX_ANCHORS:
+            anchors.clear()
+        anchors[position] = key
+
+
+def quote_value(value) -> str:
+    """Quotes a value for use inside a PostgREST filter expression."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _seek_terms(sort_field: str, key: tuple, op: str) -> str:
+    """Builds the PostgREST ``or`` filter for rows strictly after ``key``.
+
+    ``op`` is ``gt`` when moving towards larger values and ``lt`` otherwise.
+    NULL sorts as the largest value, matching Postgres' default ordering.
+    """
+    value, row_id = key
+    if sort_field == "id":
+        return f"id.{op}.{quote_value(row_id)}"
+    if value is None:
+        terms = [f"and({sort_field}.is.null,id.{op}.{quote_value(row_id)})"]
+        if op == "lt":
+            terms.append(f"{sort_field}.not.is.null")
+    else:
+        terms = [
+            f"{sort_field}.{op}.{quote_value(value)}",
+            f"and({sort_field}.eq.{quote_value(value)},id.{op}.{quote_value(row_id)})",
+        ]
+        if op == "gt":
+            terms.append(f"{sort_field}.is.null")
+    return ",".join(terms)
+
+
+def _ordered(query, sort_field: str, descending: bool):
+    if sort_field != "id":
+        query = query.order(sort_field, desc=descending)
+    return query.order("id", desc=descending)
+
+
+def _nearest_before(anchors: dict, position: int):
+    candidates = [p for p in anchors if p < position]
+    if not candidates:
+        return None
+    return max(candidates)
+
+
+def fetch_page(
+    client: Client,
+    table: str,
+    select: str,
+    page_number: int,
+    page_size: int,
+    sort_field: str,
+    descending: bool = False,
+    version: int = 0,
+    filters: tuple = (),
+) -> list:
+    """Fetches one page of ``table`` using keyset (cursor) pagination.
+
+    Pages are addressed by number, but rows are located by seeking past the
+    ``(sort_field, id)`` key of a neighbouring row instead of ``OFFSET``, so
+    stepping to the next or previous page costs the same on any page and is
+    unaffected by rows inserted elsewhere in the table.
+
+    Jumping to a page far from any known key is not constant-cost: the
+    boundary key is looked up with a narrow ``id``/sort-column query that
+    still offsets from the nearest earlier key, or from the first row, so
+    its cost grows with that distance. The position is approximate when the
+    table changes concurrently. ``filters`` (see :mod:`module.filters`) are applied
+    to every query, so only matching rows are transferred.
+    """
+    context = (table, sort_field, descending, filters, version)
+    anchors = _known_anchors(context)
+    start = (page_number - 1) * page_size
+    forward = "lt" if descending else "gt"
+    backward = "gt" if descending else "lt"
+
+    def query():
+        return apply_filters(client.table(table).select(select), filters)
+
+    if start == 0:
+        rows = (
+            _ordered(query(), sort_field, descending).limit(page_size).execute().data
+        )
+    elif start - 1 in anchors:
+        rows = (
+            _ordered(query(), sort_field, descending)
+            .or_(_seek_terms(sort_field, anchors[start - 1], forward))
+            .limit(page_size)
+            .execute()
+            .data
+        )
+    elif start + page_size in anchors:
+        # 已知下一页的首行时，反向查询后再翻转结果
+        rows = (
+            _ordered(query(), sort_field, not descending)
+            .or_(_seek_terms(sort_field, anchors[start + page_size], backward))
+            .limit(page_size)
+            .execute()
+            .data
+        )
+        rows.reverse()
+    else:
+        nearest = _nearest_before(anchors, start)
+        if nearest is not None and start - nearest <= MAX_SKIP:
+            skip = start - nearest - 1
+            key = anchors[nearest]
+        else:
+            # 只查询 id 和排序列定位边界键；有更早的锚点时从锚点向后偏移，
+            # 否则只能从头偏移，代价随位置线性增长
+            boundary_query = _ordered(
+                apply_filters(
+                    client.table(table).select(
+                        "id" if sort_field == "id" else f"id, {sort_field}"
+                    ),
+                    filters,
+                ),
+                sort_field,
+                descending,
+            )
+            offset = start - 1
+            if nearest is not None:
+                boundary_query = boundary_query.or_(
+                    _seek_terms(sort_field, anchors[nearest], forward)
+                )
+                offset = start - nearest - 2
+            boundary = boundary_query.offset(offset).limit(1).execute().data
+            if not boundary:
+                return []
+            key = (boundary[0].get(sort_field), boundary[0]["id"])
+            _remember(context, start - 1, key)
+            skip = 0
+        page_query = (
+            _ordered(query(), sort_field, descending)
+            .or_(_seek_terms(sort_field, key, forward))
+            .limit(page_size)
+        )
+        if skip:
+            page_query = page_query.offset(skip)
+        rows = page_query.execute().data
+
+    if rows:
+        _remember(context, start, (rows[0].get(sort_field), rows[0]["id"]))
+        _remember(
+            context,
+            start + len(rows) - 1,
+            (rows[-1].get(sort_field), rows[-1]["id"]),
+        )
+    return rows
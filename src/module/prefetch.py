@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+_MAX_SCOPES = 256
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="prefetch")
+_lock = threading.Lock()
+# scope -> (context, {page_number: Future})
+_inflight: OrderedDict = OrderedDict()
+
+
+def _futures(scope, context) -> dict:
+    """Returns the futures for ``scope``, cancelling them if ``context`` changed."""
+    current = _inflight.get(scope)
+    if current is None or current[0] != context:
+        if current is not None:
+            for future in current[1].values():
+                future.cancel()
+        current = _inflight[scope] = (context, {})
+        while len(_inflight) > _MAX_SCOPES:
+            _, (_, stale) = _inflight.popitem(last=False)
+            for future in stale.values():
+                future.cancel()
+    _inflight.move_to_end(scope)
+    return current[1]
+
+
+def prefetch_adjacent(scope, context, page_number: int, last_page: int, fetch):
+    """Fetches the pages before and after ``page_number`` on worker threads.
+
+    ``fetch(page_number)`` should be the cached page loader, so the results
+    land in the same cache the page reads from. ``scope`` identifies one
+    browsing session on one table and ``context`` the page size, sort order
+    and data version; when the context changes, queued fetches for the old
+    one are cancelled.
+    """
+    with _lock:
+        futures = _futures(scope, context)
+        for page in (page_number + 1, page_number - 1):
+            if 1 <= page <= last_page and page not in futures:
+                futures[page] = _executor.submit(fetch, page)
+
+
+def wait_for_prefetch(scope, context, page_number: int, timeout: float = 30):
+    """Blocks until an in-flight prefetch of ``page_number`` has finished.
+
+    Avoids fetching the same page twice when the user moves to a page whose
+    prefetch has not completed yet.
+    """
+    with _lock:
+        current = _inflight.get(scope)
+        if current is None or current[0] != context:
+            return
+        future = current[1].get(page_number)
+    if future is None or future.cancelled():
+        return
+    try:
+        future.result(timeout=timeout)
+    except Exception:
+        # 预取失败时由页面重新获取数据并显示错误
+        pass
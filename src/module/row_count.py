@@ -0,0 +1,63 @@
+import threading
+import time
+
+from supabase import Client
+
+from module.filters import apply_filters
+
+# 规划器估计的行数低于该值时才执行精确计数
+EXACT_THRESHOLD = 50_000
+COUNT_TTL = 600
+
+_lock = threading.Lock()
+# (table, filters) -> {"count": int, "exact": bool, "fetched_at": float}
+_counts = {}
+
+
+def _query_count(client: Client, table: str, method: str, filters: tuple):
+    query = apply_filters(client.table(table).select("id", count=method), filters)
+    return query.limit(1).execute().count
+
+
+def get_row_count(client: Client, table: str, filters: tuple = ()) -> tuple:
+    """Returns ``(count, exact)`` for ``table``.
+
+    Large tables use the Postgres planner estimate instead of a full
+    ``count(*)`` scan. The result is cached per table for ``COUNT_TTL``
+    seconds per table and filter set and kept current by
+    :func:`adjust_row_count` for local writes.
+    """
+    key = (table, filters)
+    with _lock:
+        cached = _counts.get(key)
+        if cached and time.monotonic() - cached["fetched_at"] < COUNT_TTL:
+            return cached["count"], cached["exact"]
+
+    count = _query_count(client, table, "planned", filters)
+    exact = False
+    if count is None or count < EXACT_THRESHOLD:
+        count = _query_count(client, table, "exact", filters) or 0
+        exact = True
+
+    with _lock:
+        _counts[key] = {
+            "count": count,
+            "exact": exact,
+            "fetched_at": time.monotonic(),
+        }
+    return count, exact
+
+
+def adjust_row_count(table: str, delta: int):
+    """Applies locally inserted (+) or deleted (-) rows to the cached count.
+
+    Filtered counts cannot be adjusted without knowing which rows match, so
+    they are dropped and recounted on next use.
+    """
+    with _lock:
+        for key in [k for k in _counts if k[0] == table and k[1]]:
+            del _counts[key]
+        cached = _counts.get((table, ()))
+        if cached:
+            cached["count"] = max(0, cached["count"] + delta)
+
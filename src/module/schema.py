@@ -0,0 +1,136 @@
+from typing import NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+TIMEZONE = "Asia/Shanghai"
+
+# 文本列使用 Arrow 存储，比 object 列占用更少内存，序列化到浏览器也更快
+STRING_DTYPE = pd.StringDtype("pyarrow")
+
+LANGUAGES = ("eng", "chi_sim", "chi_tra", "fra", "spa", "jpn", "kor")
+
+
+class Column(NamedTuple):
+    """One column of an admin table.
+
+    ``kind`` is ``id``, ``text``, ``category``, ``link``, ``date`` (a calendar
+    date stored in UTC) or ``timestamp`` (shown in ``TIMEZONE``).
+    """
+
+    name: str
+    kind: str
+    required: bool = False
+    editable: bool = True
+    options: tuple = ()
+
+
+TABLES = {
+    "esg_meta": (
+        Column("id", "id", editable=False),
+        Column("country", "text"),
+        Column("company_name", "text"),
+        Column("report_title", "text"),
+        Column("publication_date", "date", required=True),
+        Column("language", "category", options=LANGUAGES),
+        Column("report_url", "link"),
+        Column("uploaded_time", "timestamp", editable=False),
+        Column("created_time", "timestamp", editable=False),
+        Column("last_updated_time", "timestamp", editable=False),
+    ),
+    "reports": (
+        Column("id", "id", editable=False),
+        Column("title", "text"),
+        Column("issuing_organization", "text"),
+        Column("release_date", "date"),
+        Column("language", "category", options=LANGUAGES),
+        Column("url", "link"),
+        Column("uploaded_time", "timestamp", editable=False),
+    ),
+    "standards": (
+        Column("id", "id", editable=False),
+        Column("title", "text"),
+        Column("issuing_organization", "text"),
+        Column("effective_date", "date"),
+        Column("expiration_date", "date"),
+        Column("standard_number", "text"),
+        Column("url", "link"),
+        Column("uploaded_time", "timestamp", editable=False),
+        Column("last_updated_time", "timestamp", editable=False),
+    ),
+    "internal_use": (
+        Column("id", "id", editable=False),
+        Column("tag", "text"),
+        Column("title", "text"),
+        Column("file_type", "text"),
+        Column("uploaded_time", "timestamp", editable=False),
+        Column("created_time", "timestamp", editable=False),
+    ),
+}
+
+
+def column_names(table: str) -> list:
+    return [column.name for column in TABLES[table]]
+
+
+def select_clause(table: str) -> str:
+    return ", ".join(column_names(table))
+
+
+def _decode_column(values: pd.Series, column: Column) -> pd.Series:
+    if column.kind == "timestamp":
+        return pd.to_datetime(values, utc=True, format="ISO8601").dt.tz_convert(
+            TIMEZONE
+        )
+    if column.kind == "date":
+        return pd.to_datetime(values, utc=True, format="ISO8601")
+    if column.kind == "category":
+        observed = values.dropna().astype(str).unique().tolist()
+        categories = list(dict.fromkeys([*column.options, *sorted(observed)]))
+        return values.astype(pd.CategoricalDtype(categories=categories))
+    if column.kind in ("text", "link"):
+        return values.astype(STRING_DTYPE)
+    return values
+
+
+def decode(table: str, rows: list) -> pd.DataFrame:
+    """Builds a typed DataFrame from PostgREST (or mirror) JSON rows.
+
+    Each column is converted in one vectorised step according to
+    ``TABLES[table]``; an empty result still has every column and dtype.
+    """
+    schema = TABLES[table]
+    frame = pd.DataFrame.from_records(rows, columns=[c.name for c in schema])
+    return pd.DataFrame(
+        {column.name: _decode_column(frame[column.name], column) for column in schema}
+    )
+
+
+def column_config(table: str) -> dict:
+    """Returns the ``st.data_editor`` column configuration for ``table``."""
+    config = {}
+    for column in TABLES[table]:
+        disabled = not column.editable
+        if column.kind == "id":
+            config[column.name] = st.column_config.TextColumn(disabled=True)
+        elif column.kind == "category":
+            config[column.name] = st.column_config.SelectboxColumn(
+                required=column.required, disabled=disabled
+            )
+        elif column.kind == "link":
+            config[column.name] = st.column_config.LinkColumn(
+                display_text="Open file", disabled=disabled
+            )
+        elif column.kind == "date":
+            config[column.name] = st.column_config.DateColumn(
+                required=column.required, disabled=disabled
+            )
+        elif column.kind == "timestamp":
+            config[column.name] = st.column_config.DatetimeColumn(
+                format="YYYY-MM-DD HH:mm:ss", disabled=disabled
+            )
+        else:
+            config[column.name] = st.column_config.TextColumn(
+                required=column.required, disabled=disabled
+            )
+    return config
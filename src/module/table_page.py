@@ -0,0 +1,452 @@
+import os
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import NamedTuple
+
+import pandas as pd
+import pytz
+import streamlit as st
+
+from module.bulk_upload import run_bulk_upload, stored_checksums, upload_records
+from module.bulk_write import update_rows
+from module.database import get_client
+from module.file_nas import nas_folder, upload_stream
+from module.filters import filter_panel
+from module.jobs import jobs_for, session_owner, submit
+from module.mirror import get_mirror, mirror_enabled
+from module.page_cache import read_rows
+from module.pagination import fetch_page
+from module.prefetch import prefetch_adjacent, wait_for_prefetch
+from module.row_count import get_row_count
+from module.schema import (
+    TIMEZONE,
+    column_config,
+    column_names,
+    decode,
+    select_clause,
+)
+from module.timing import timed
+from module.versions import bump_table_version, table_version
+
+# 有后台任务进行时任务列表的刷新间隔（秒）
+JOB_POLL_INTERVAL = 2
+
+
+class TablePage(NamedTuple):
+    """Layout of one admin table page."""
+
+    table: str
+    # 未选择排序时的默认排序列（降序）
+    default_sort: str
+    # 上传文件时用于标识记录的列
+    title_column: str
+    text_columns: tuple
+    date_columns: tuple
+    editor_height: int = 400
+    dynamic_rows: bool = True
+
+
+def _key(page: TablePage, name: str) -> str:
+    # session_state 在所有页面间共享，按表名区分
+    return f"{page.table}_{name}"
+
+
+def _fetch_data(
+    page: TablePage,
+    mirror,
+    page_number: int,
+    page_size: int,
+    sort_field: str = None,
+    sort_order: str = "asc",
+    data_version: int = 0,
+    mirror_generation: int = -1,
+    filters: tuple = (),
+):
+    if not sort_field:
+        sort_field, sort_order = page.default_sort, "desc"
+
+    def load_block(block: int, block_size: int):
+        # 数据块在所有会话间共享缓存，出错时直接抛出，避免缓存错误结果
+        if mirror_generation >= 0:
+            rows = mirror.page(
+                sort_field,
+                sort_order == "desc",
+                offset=block * block_size,
+                limit=block_size,
+                filters=filters,
+            )
+        else:
+            rows = fetch_page(
+                get_client(),
+                page.table,
+                select_clause(page.table),
+                page_number=block + 1,
+                page_size=block_size,
+                sort_field=sort_field,
+                descending=(sort_order == "desc"),
+                version=data_version,
+                filters=filters,
+            )
+        return decode(page.table, rows)
+
+    # 按固定大小的数据块获取并缓存，切换页大小时只加载尚未缓存的块
+    return read_rows(
+        (page.table, sort_field, sort_order, data_version, mirror_generation, filters),
+        (page_number - 1) * page_size,
+        page_size,
+        load_block,
+    )
+
+
+def _total_count(page: TablePage, mirror, filters: tuple):
+    if mirror is not None and mirror.ready:
+        return mirror.count(filters), True
+    try:
+        return get_row_count(get_client(), page.table, filters)
+    except Exception as e:
+        st.error(f"Error fetching total count: {e}")
+        return 0, True
+
+
+def _record_uploads(client, page: TablePage, uploads: dict) -> list:
+    """Stores uploaded_time, checksum and size of ``{id: UploadResult}``.
+
+    Returns the ids whose records were deleted while their files uploaded.
+    """
+    now = datetime.now(pytz.timezone(TIMEZONE)).isoformat()
+    _, missing = update_rows(client, page.table, upload_records(uploads, now))
+    bump_table_version(page.table)
+    return missing
+
+
+@st.fragment
+def _query_panel(page: TablePage):
+    """Sidebar sort and filter controls.
+
+    Changing them reruns only this fragment; the whole page reruns once the
+    resulting query differs from the one the grid last rendered.
+    """
+    with timed(f"{page.table}/query"):
+        columns = column_names(page.table)
+
+        # 排序选项
+        sort = st.radio("Sort Data", options=["Yes", "No"], horizontal=True, index=1)
+        if sort == "Yes" and columns:
+            sort_field = st.selectbox("Sort By", options=columns)
+            sort_direction = st.radio(
+                "Direction", options=["⬆️ Ascending", "⬇️ Descending"], horizontal=True
+            )
+            sort_order = "asc" if sort_direction == "⬆️ Ascending" else "desc"
+        else:
+            sort_field = None
+            sort_order = "asc"
+
+        # 筛选条件下推到查询中，只传输匹配的行
+        filters = filter_panel(
+            columns,
+            text_columns=page.text_columns,
+            date_columns=page.date_columns,
+        )
+
+        query = (sort_field, sort_order, filters)
+        st.session_state[_key(page, "query")] = query
+
+    # 展开选项或输入未提交时不刷新表格
+    rendered = st.session_state.get(_key(page, "rendered_query"))
+    if rendered is not None and rendered != query:
+        # 先记录新查询，否则整页重跑时本片段会再次触发重跑，表格永远不会渲染
+        st.session_state[_key(page, "rendered_query")] = query
+        st.rerun()
+
+
+@st.fragment
+def _grid(page: TablePage, mirror):
+    """Pagination controls and data editor.
+
+    Page changes and cell edits rerun only this fragment.
+    """
+    with timed(f"{page.table}/grid"):
+        query = st.session_state[_key(page, "query")]
+        st.session_state[_key(page, "rendered_query")] = query
+        # 表格已包含此前完成的后台任务的结果
+        st.session_state[_key(page, "jobs_seen")] = sum(
+            1 for job in jobs_for(session_owner()) if job.status == "done"
+        )
+        sort_field, sort_order, filters = query
+
+        # 数据版本在所有会话间共享，任何写入都会使缓存的页面失效
+        data_version = table_version(page.table)
+        use_mirror = mirror is not None and mirror.ready
+        mirror_generation = mirror.generation if use_mirror else -1
+
+        # 获取总记录数
+        total_count, count_exact = _total_count(page, mirror, filters)
+
+        # 底部菜单：分页控制
+        bottom_menu = st.columns((4, 1, 1))
+        with bottom_menu[2]:
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                st.write("Page Size")
+            with col2:
+                batch_size = st.selectbox(
+                    "Page Size",
+                    label_visibility="collapsed",
+                    options=[25, 50, 100],
+                    index=0,
+                )
+        with bottom_menu[1]:
+            total_pages = max(1, (total_count + batch_size - 1) // batch_size)
+            # 估计值可能偏小，预留少量页数
+            max_page = (
+                total_pages if count_exact else total_pages + total_pages // 20 + 1
+            )
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                st.write("Page")
+            with col2:
+                current_page = st.number_input(
+                    "Page",
+                    label_visibility="collapsed",
+                    min_value=1,
+                    max_value=max_page,
+                    step=1,
+                    value=1,
+                    # 筛选条件变化时回到第一页
+                    key=f"page-{hash(filters)}",
+                )
+        with bottom_menu[0]:
+            if count_exact:
+                st.markdown(f"Page **{current_page}** of **{total_pages}**")
+            else:
+                st.markdown(
+                    f"Page **{current_page}** of **~{total_pages}** "
+                    f"(about {total_count:,} rows, estimated)"
+                )
+
+        # 获取当前页面的数据，若该页正在后台预取则等待其完成
+        prefetch_scope = (st.session_state.prefetch_scope, page.table)
+        prefetch_context = (
+            batch_size,
+            sort_field,
+            sort_order,
+            data_version,
+            mirror_generation,
+            filters,
+        )
+        fetch = partial(
+            _fetch_data,
+            page,
+            mirror,
+            page_size=batch_size,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            data_version=data_version,
+            mirror_generation=mirror_generation,
+            filters=filters,
+        )
+        wait_for_prefetch(prefetch_scope, prefetch_context, current_page)
+        try:
+            dataset = fetch(page_number=current_page)
+        except Exception as e:
+            st.error(f"Error fetching data: {e}")
+            dataset = decode(page.table, [])
+
+        # 在后台预取前后相邻的页面
+        prefetch_adjacent(
+            prefetch_scope,
+            prefetch_context,
+            page_number=current_page,
+            last_page=max_page,
+            fetch=fetch,
+        )
+
+        # 上传面板从这里读取当前页的记录
+        st.session_state[_key(page, "records")] = (
+            dataset["id"].astype(str) + " - " + dataset[page.title_column]
+        ).tolist()
+
+        # 显示数据编辑器
+        st.data_editor(
+            data=dataset,
+            disabled=["id"],  # 使 'id' 列只读
+            use_container_width=True,
+            num_rows="dynamic" if page.dynamic_rows else "fixed",
+            height=page.editor_height,
+            key="data_editor",
+            column_config=column_config(page.table),
+        )
+
+
+@st.fragment
+def _upload_panel(page: TablePage):
+    """Upload expander; submitting the form reruns only this fragment.
+
+    The record list is the page the grid showed when this fragment last ran.
+    """
+    with st.expander("Upload File for Selected Record"):
+        record_options = st.session_state.get(_key(page, "records"), [])
+
+        # Wrap upload logic in a separate form
+        with st.form("upload_form"):
+            selected_record = st.selectbox("Select a record", options=record_options)
+            uploaded_file = st.file_uploader(
+                "Upload a file", type=["pdf", "docx", "txt"]
+            )
+
+            upload_submitted = st.form_submit_button("Upload File")
+
+    if not upload_submitted:
+        return
+    if not (uploaded_file and selected_record):
+        st.error("Please select a record and upload a valid file.")
+        return
+
+    # 提取选中的记录 ID
+    selected_id = selected_record.split(" - ")[0]
+
+    # NAS 上的文件名为记录 ID 加原扩展名
+    file_extension = os.path.splitext(uploaded_file.name)[1]
+    file_name = f"{selected_id}{file_extension}"
+    client = get_client()
+
+    def upload(report):
+        known = stored_checksums(client, page.table, [selected_id])
+        uploaded_file.seek(0)
+        result = upload_stream(
+            uploaded_file,
+            file_name,
+            nas_folder(page.table),
+            size=uploaded_file.size,
+            progress=report,
+            known_checksum=known.get(selected_id),
+        )
+        if result.skipped:
+            report(1.0, "The NAS already has this file; nothing uploaded")
+            return None
+        if not result.ok:
+            raise RuntimeError("The NAS did not accept the file")
+        # NAS 确认后才更新上传时间、校验和与文件大小
+        if _record_uploads(client, page, {selected_id: result}):
+            report(1.0, f"Record {selected_id} was deleted; upload not recorded")
+        return None
+
+    # 上传在后台任务中完成，页面可以继续编辑
+    submit(session_owner(), f"{page.table}: {file_name}", upload)
+    st.rerun()
+
+
+@st.fragment
+def _bulk_upload_panel(page: TablePage):
+    """Uploads many files at once, matching each to a record by id or title."""
+    with st.expander("Bulk Upload"):
+        with st.form("bulk_upload_form", clear_on_submit=True):
+            uploaded_files = st.file_uploader(
+                "Upload files",
+                type=["pdf", "docx", "txt"],
+                accept_multiple_files=True,
+                help=(
+                    "Files are matched by a leading record id "
+                    f"(<id>.pdf, <id>_name.pdf) or by {page.title_column}"
+                ),
+            )
+            submitted = st.form_submit_button("Upload Files")
+
+    if not submitted:
+        return
+    if not uploaded_files:
+        st.error("Please choose at least one file.")
+        return
+
+    client = get_client()
+    files = [(f.name, f) for f in uploaded_files]
+    submit(
+        session_owner(),
+        f"{page.table}: {len(files)} files",
+        partial(
+            run_bulk_upload,
+            client,
+            page.table,
+            page.title_column,
+            files,
+            nas_folder(page.table),
+            partial(_record_uploads, client, page),
+        ),
+    )
+    st.rerun()
+
+
+def _jobs_view(page: TablePage):
+    jobs = jobs_for(session_owner())
+    if not jobs:
+        return
+    st.caption("Background jobs")
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "job": [j.label for j in jobs],
+                "status": [j.status for j in jobs],
+                "progress": [j.progress for j in jobs],
+                "attempts": [j.attempts for j in jobs],
+                "message": [j.message for j in jobs],
+            }
+        ),
+        column_config={
+            "progress": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+    for job in jobs:
+        if isinstance(job.result, pd.DataFrame):
+            with st.expander(f"Results of {job.label}"):
+                st.dataframe(job.result, use_container_width=True, hide_index=True)
+
+    # 任务完成后由用户决定何时刷新表格，避免打断正在进行的编辑
+    finished = sum(1 for j in jobs if j.status == "done")
+    if finished > st.session_state.get(_key(page, "jobs_seen"), 0):
+        if st.button("Refresh table", key=_key(page, "refresh_jobs")):
+            st.rerun()
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _live_jobs_panel(page: TablePage):
+    """Job list that polls while this session has queued or running jobs."""
+    _jobs_view(page)
+    if not any(job.active for job in jobs_for(session_owner())):
+        # 所有任务结束后换成不轮询的任务列表
+        st.rerun()
+
+
+@st.fragment
+def _jobs_panel(page: TablePage):
+    _jobs_view(page)
+
+
+def render_table_page(page: TablePage):
+    """Renders the sidebar query panel, the grid and the upload panel.
+
+    Each region is a fragment, so interacting with one of them reruns only
+    that region; the Supabase client, mirror and caches are process-wide.
+    """
+    with timed(f"{page.table}/page"):
+        # 每个会话独立的预取范围，切换排序或页大小时取消旧的预取
+        if "prefetch_scope" not in st.session_state:
+            st.session_state.prefetch_scope = uuid.uuid4().hex
+
+        # 可选的本地镜像：启用后分页、排序和计数都在本地完成，写入仍然提交到 Supabase
+        mirror = None
+        if mirror_enabled():
+            mirror = get_mirror(page.table)
+            mirror.refresh_in_background(get_client())
+
+        with st.sidebar:
+            _query_panel(page)
+        _grid(page, mirror)
+        _upload_panel(page)
+        _bulk_upload_panel(page)
+        if any(job.active for job in jobs_for(session_owner())):
+            _live_jobs_panel(page)
+        else:
+            _jobs_panel(page)
@@ -0,0 +1,43 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# region -> {"runs": int, "total_ms": float, "last_ms": float, "max_ms": float}
+_stats = {}
+
+
+@contextmanager
+def timed(region: str):
+    """Records the server time spent rendering ``region`` of a page."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        with _lock:
+            stats = _stats.setdefault(
+                region, {"runs": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["runs"] += 1
+            stats["total_ms"] += elapsed
+            stats["last_ms"] = elapsed
+            stats["max_ms"] = max(stats["max_ms"], elapsed)
+        logger.debug("%s rendered in %.1f ms", region, elapsed)
+
+
+def timing_stats() -> dict:
+    """Returns per-region run counts and average/last/max server time in ms."""
+    with _lock:
+        return {
+            region: {
+                "runs": stats["runs"],
+                "avg_ms": round(stats["total_ms"] / stats["runs"], 1),
+                "last_ms": round(stats["last_ms"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+            }
+            for region, stats in _stats.items()
+        }
@@ -0,0 +1,21 @@
+import threading
+
+_lock = threading.Lock()
+_versions = {}
+
+
+def table_version(table: str) -> int:
+    """Returns the process-wide data version of ``table``.
+
+    Cached pages are keyed on this version, so every session shares one
+    cached copy of a page and sees other sessions' writes on its next rerun.
+    """
+    with _lock:
+        return _versions.get(table, 0)
+
+
+def bump_table_version(table: str) -> int:
+    """Invalidates cached pages of ``table``; call after every write."""
+    with _lock:
+        _versions[table] = _versions.get(table, 0) + 1
+        return _versions[table]
@@ -0,0 +1,151 @@
+import streamlit as st
+
+from module.agent_cache import get_agent_cache
+from module.agent_stream import AgentRun
+from module.bulk_write import update_rows
+from module.database import get_client
+from module.esg_agent import query_text
+from module.versions import bump_table_version
+
+# 配置 Streamlit 页面
+st.set_page_config(
+    page_title="ESG Search",
+    layout="wide",
+    initial_sidebar_state="expanded",
+    page_icon="src/static/favicon.ico",
+)
+
+# 运行中的结果刷新间隔（秒）
+POLL_INTERVAL = 1
+
+
+def accept_candidate(url: str, record_id) -> bool:
+    """Stores ``url`` as the report of the esg_meta row ``record_id``.
+
+    Returns False if the record has been deleted in the meantime.
+    """
+    _, missing = update_rows(
+        get_client(), "esg_meta", [{"id": record_id, "report_url": url}]
+    )
+    bump_table_version("esg_meta")
+    return not missing
+
+
+def render_run(run: AgentRun, record_id):
+    state = run.snapshot()
+    status = f"**{state['status']}** after {state['elapsed']:.1f}s"
+    if state["first_candidate"] is not None:
+        status += f", first candidate after {state['first_candidate']:.1f}s"
+    st.markdown(status)
+    if state["error"]:
+        st.error(state["error"])
+    if run.active and st.button("Stop"):
+        run.stop()
+
+    accepted = st.session_state.setdefault("esg_accepted", set())
+    st.subheader("Candidate reports")
+    if not state["candidates"]:
+        st.caption("No candidate URLs yet.")
+    for i, candidate in enumerate(state["candidates"]):
+        col1, col2 = st.columns((5, 1))
+        with col1:
+            st.markdown(f"[{candidate['url']}]({candidate['url']})")
+            st.caption(f"{candidate['node']}: {candidate['context']}")
+        with col2:
+            if (run.id, candidate["url"]) in accepted:
+                st.write("Accepted")
+            elif st.button(
+                "Accept", key=f"accept-{run.id}-{i}", disabled=record_id is None
+            ):
+                # 运行仍在继续时也可以采用候选结果
+                try:
+                    if accept_candidate(candidate["url"], record_id):
+                        accepted.add((run.id, candidate["url"]))
+                        st.rerun(scope="fragment")
+                    st.error(
+                        f"Record {record_id} not found; it may have been deleted"
+                    )
+                except Exception as e:
+                    st.error(f"Error saving report URL: {e}")
+
+    with st.expander("Agent messages", expanded=run.active):
+        with st.container(height=300):
+            for node, text in state["events"]:
+                st.markdown(f"**{node}**: {text}")
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def live_run(run: AgentRun, record_id):
+    render_run(run, record_id)
+    if not run.active:
+        # 运行结束后停止轮询
+        st.rerun()
+
+
+@st.fragment
+def finished_run(run: AgentRun, record_id):
+    render_run(run, record_id)
+
+
+if "password_correct" in st.session_state:
+    with st.form("esg_search"):
+        col1, col2 = st.columns((3, 1))
+        with col1:
+            company = st.text_input("Company")
+        with col2:
+            year = st.number_input(
+                "Year", min_value=1990, max_value=2100, value=None, step=1
+            )
+        submitted = st.form_submit_button("Search")
+
+    if submitted and company.strip():
+        previous = st.session_state.get("esg_run")
+        if previous is not None:
+            previous.stop()
+        # 智能体在后台线程中流式运行，页面轮询显示中间结果
+        st.session_state.esg_run = AgentRun.start(
+            query_text(company, int(year) if year else None), cache=get_agent_cache()
+        )
+        st.session_state.esg_company = company.strip()
+
+    run = st.session_state.get("esg_run")
+    if run is not None:
+        company = st.session_state.esg_company
+        st.caption(f"Query: {run.query}")
+        try:
+            records = (
+                get_client()
+                .table("esg_meta")
+                .select("id, report_title, publication_date")
+                .ilike("company_name", f"%{company}%")
+                .limit(50)
+                .execute()
+                .data
+            )
+        except Exception as e:
+            st.error(f"Error fetching records: {e}")
+            records = []
+        labels = {}
+        for record in records:
+            labels[record["id"]] = (
+                f"{record['id']} - {record.get('report_title') or ''} "
+                f"({record.get('publication_date') or 'no date'})"
+            )
+        record_id = None
+        if labels:
+            record_id = st.selectbox(
+                "Accepted URLs are saved to",
+                options=list(labels),
+                format_func=labels.get,
+            )
+        else:
+            # 不创建只有公司名和链接的不完整记录
+            st.info(
+                f"No esg_meta record matches {company}. "
+                "Add the record on the ESG page to save a report URL."
+            )
+
+        if run.active:
+            live_run(run, record_id)
+        else:
+            finished_run(run, record_id)